@@ -33,14 +33,14 @@ echo ""
 echo "Starting all Mozbot services..."
 echo ""
 
-# Start Backend (Flask typically runs on 5000)
+# Start Backend (Flask typically runs on 5000; one process, so it can deliver the outbox itself)
 echo "🔧 Starting Backend..."
 cd mozbot-backend
 if [ -d "venv" ]; then
     if [[ "$OSTYPE" == "msys" || "$OSTYPE" == "cygwin" || "$OSTYPE" == "win32" ]]; then
-        start_service "Backend" "source venv/Scripts/activate && python src/main.py" "5000"
+        start_service "Backend" "source venv/Scripts/activate && OUTBOX_WORKERS=2 python src/main.py" "5000"
     else
-        start_service "Backend" "source venv/bin/activate && python src/main.py" "5000"
+        start_service "Backend" "source venv/bin/activate && OUTBOX_WORKERS=2 python src/main.py" "5000"
     fi
 else
     echo "⚠️  Virtual environment not found. Run ./quick-setup.sh first."
@@ -4,9 +4,10 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 from src.main import app
 from src.models import db
+from src.migrations import upgrade
 
 with app.app_context():
-    db.create_all()
-    print("Database tables created successfully")
+    upgrade(db.engine, echo=print)
+    print("Database schema is up to date")
 
 
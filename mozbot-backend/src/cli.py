@@ -0,0 +1,150 @@
+"""
+Management Commands
+Flask CLI commands for maintenance tasks (run with `flask --app src.main <command>`)
+"""
+
+import click
+import time
+from src.models import db
+from src.models.chatbot import Chatbot, rebuild_chatbot_stats
+from src.models.conversation import Conversation
+from src.services.archive_service import archive_service
+from src.services.inbox_service import inbox_service
+from src.services.ingest_service import ingest_service, read_jsonl
+from src.services.outbox_service import outbox_service
+from src.services.revocation_service import revocation_service
+from src import migrations
+
+def register_commands(app):
+    """Register management commands on the Flask CLI"""
+    
+    @app.cli.command('db-upgrade')
+    @click.option('--revision', type=int, default=None, help='Stop at this revision instead of head')
+    def db_upgrade_command(revision):
+        """Apply pending schema migrations"""
+        applied = migrations.upgrade(db.engine, target=revision, echo=click.echo)
+        current, head = migrations.check_schema(db.engine)
+        if not applied:
+            click.echo(f"Database already at revision {current}")
+        else:
+            click.echo(f"Database upgraded to revision {current} (head is {head})")
+    
+    @app.cli.command('db-version')
+    def db_version_command():
+        """Show the database schema revision and the latest available revision"""
+        current, head = migrations.check_schema(db.engine)
+        click.echo(f"Current revision: {current}")
+        click.echo(f"Head revision: {head}")
+    
+    @app.cli.command('rebuild-chatbot-stats')
+    @click.option('--chatbot-id', 'chatbot_ids', multiple=True, help='Only rebuild these chatbots')
+    def rebuild_chatbot_stats_command(chatbot_ids):
+        """Recompute chatbot_stats counters from the source tables"""
+        count = rebuild_chatbot_stats(chatbot_ids or None)
+        click.echo(f"Rebuilt stats for {count} chatbot(s)")
+    
+    @app.cli.command('rebuild-conversation-summaries')
+    @click.option('--conversation-id', 'conversation_ids', multiple=True, help='Only rebuild these conversations')
+    def rebuild_conversation_summaries_command(conversation_ids):
+        """Recompute conversation message_count and last_message_* columns"""
+        count = Conversation.rebuild_summaries(conversation_ids or None)
+        click.echo(f"Rebuilt summaries for {count} conversation(s)")
+    
+    @app.cli.command('prune-revoked-tokens')
+    def prune_revoked_tokens_command():
+        """Delete revoked-token rows whose tokens have expired"""
+        count = revocation_service.prune_expired()
+        db.session.commit()
+        click.echo(f"Pruned {count} expired revocation(s)")
+    
+    @app.cli.command('archive-messages')
+    @click.option('--tenant-id', default=None, help='Only archive this tenant')
+    @click.option('--batch-size', type=int, default=200, show_default=True, help='Conversations per transaction')
+    def archive_messages_command(tenant_id, batch_size):
+        """Move messages of old resolved conversations into compressed archive blobs"""
+        count = archive_service.archive_conversations(
+            tenant_id,
+            batch_size=batch_size,
+            progress=lambda total: click.echo(f"{total} conversations archived")
+        )
+        click.echo(f"Archived {count} conversation(s)")
+    
+    @app.cli.command('import-history')
+    @click.argument('source', type=click.File('r', encoding='utf-8'))
+    @click.option('--tenant-id', required=True, help='Tenant that owns the imported conversations')
+    @click.option('--chatbot-id', required=True, help='Chatbot the conversations are attached to')
+    @click.option('--batch-size', type=int, default=5000, show_default=True, help='Messages per transaction')
+    def import_history_command(source, tenant_id, chatbot_id, batch_size):
+        """Import conversation history from a JSONL file (use - for stdin)
+        
+        One conversation per line, with its messages nested under "messages".
+        Conversations and messages are matched on external_id, so an
+        interrupted import can simply be run again.
+        """
+        chatbot = Chatbot.query.filter_by(id=chatbot_id, tenant_id=tenant_id).first()
+        if not chatbot:
+            raise click.ClickException('Chatbot not found for this tenant')
+        
+        started = time.monotonic()
+        
+        def report(totals):
+            elapsed = max(time.monotonic() - started, 0.001)
+            click.echo(
+                f"{totals['conversations']} conversations, {totals['messages']} messages imported "
+                f"({totals['skipped_conversations']} conversations, {totals['skipped_messages']} messages already present, "
+                f"{totals['conflicting_messages']} duplicate messages) "
+                f"- {int(totals['messages'] / elapsed)} messages/s"
+            )
+        
+        try:
+            totals = ingest_service.import_history(
+                tenant_id,
+                chatbot_id,
+                read_jsonl(source),
+                batch_size=batch_size,
+                progress=report
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        
+        click.echo(f"Import finished in {time.monotonic() - started:.1f}s")
+    
+    @app.cli.command('outbox-worker')
+    @click.option('--workers', type=int, default=4, show_default=True, help='Delivery threads')
+    def outbox_worker_command(workers):
+        """Deliver queued outbound messages until interrupted
+        
+        Run exactly one: the per-platform and per-bot rate limits are
+        enforced in this process only.
+        """
+        outbox_service.workers.start(app, workers)
+        click.echo(f"Outbox worker running with {workers} thread(s)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            outbox_service.workers.stop(timeout=30)
+    
+    @app.cli.command('webhook-worker')
+    @click.option('--workers', type=int, default=4, show_default=True, help='Processing threads')
+    def webhook_worker_command(workers):
+        """Process webhooks queued by WEBHOOK_ASYNC_INGEST until interrupted"""
+        inbox_service.workers.start(app, workers)
+        click.echo(f"Webhook worker running with {workers} thread(s)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            inbox_service.workers.stop(timeout=30)
+    
+    @app.cli.command('requeue-dead-letters')
+    @click.option('--tenant-id', default=None, help='Only requeue this tenant')
+    @click.option('--queue', type=click.Choice(['all', 'outbox', 'webhooks']), default='all', show_default=True)
+    def requeue_dead_letters_command(tenant_id, queue):
+        """Retry outbound messages and webhooks that exhausted their attempts"""
+        if queue in ('all', 'outbox'):
+            count = outbox_service.requeue_dead(tenant_id)
+            click.echo(f"Requeued {count} outbound message(s)")
+        if queue in ('all', 'webhooks'):
+            count = inbox_service.requeue_dead(tenant_id)
+            click.echo(f"Requeued {count} webhook(s)")
@@ -3,16 +3,127 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+def _channel_map(value):
+    """Parse "telegram=30,whatsapp=80" into {'telegram': 30.0, 'whatsapp': 80.0}"""
+    pairs = (item.split("=", 1) for item in value.split(",") if "=" in item)
+    return {key.strip(): float(rate) for key, rate in pairs}
+
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY") or "your-strong-secret-key-here"
     JWT_SECRET_KEY = os.environ.get("JWT_SECRET_KEY") or "your-strong-jwt-secret-key-here"
     JWT_ACCESS_TOKEN_EXPIRES = 86400  # 24 hours
     JWT_REFRESH_TOKEN_EXPIRES = 2592000  # 30 days
     
+    # Revoked token IDs are mirrored per process and re-synced this often (seconds)
+    REVOCATION_REFRESH_SECONDS = int(os.environ.get("REVOCATION_REFRESH_SECONDS", 5))
+    REVOCATION_REFRESH_OVERLAP = 60  # Re-read window for rows committed out of order
+    REVOCATION_PRUNE_INTERVAL = 3600  # Delete expired revocations at most this often
+    
     # Database
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL") or "sqlite:///instance/mozbot.db"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Read replicas (comma-separated URLs) for endpoints marked @read_replica
+    SQLALCHEMY_REPLICA_URIS = [url.strip() for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    # After a write, that user's reads stay on the primary for this many seconds
+    REPLICA_READ_YOUR_WRITES_SECONDS = int(os.environ.get("REPLICA_READ_YOUR_WRITES_SECONDS", 5))
+    
+    # One transaction per request: save() flushes and the request commits once
+    REQUEST_UNIT_OF_WORK = os.environ.get("REQUEST_UNIT_OF_WORK", "true").lower() == "true"
+    
+    # Primary key generation: 'uuid7' (time-ordered) or 'uuid4' (random)
+    ID_STRATEGY = os.environ.get("ID_STRATEGY", "uuid7")
+    
+    # Messages of resolved conversations move to the archive tier after this many
+    # days (tenants can override with settings['archive_after_days']; 0 disables)
+    ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", 90))
+    
+    # Seconds a user's active flag and tenant memberships are cached for auth checks (0 disables)
+    PRINCIPAL_CACHE_TTL = int(os.environ.get("PRINCIPAL_CACHE_TTL", 60))
+    
+    # Password hashing: werkzeug method string; stored hashes made with other parameters
+    # are upgraded on the next successful login
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+    # Hashing runs in this many worker processes (0 runs inline on the request thread)
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+    # Hashes allowed to wait for a worker before logins are rejected with 503
+    PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get("PASSWORD_HASH_QUEUE_LIMIT", 16))
+    PASSWORD_HASH_TIMEOUT = int(os.environ.get("PASSWORD_HASH_TIMEOUT", 10))
+    
+    # Reverse proxies / load balancers in front of the app. Their X-Forwarded-For
+    # (and -Proto/-Host) entries are trusted so request.remote_addr is the client
+    # IP that the per-IP login throttle counts; 0 when clients connect directly
+    TRUSTED_PROXY_COUNT = int(os.environ.get("TRUSTED_PROXY_COUNT", 0))
+    
+    # Failed login throttling per fixed window
+    LOGIN_THROTTLE_WINDOW = int(os.environ.get("LOGIN_THROTTLE_WINDOW", 900))
+    LOGIN_MAX_FAILURES_PER_ACCOUNT = int(os.environ.get("LOGIN_MAX_FAILURES_PER_ACCOUNT", 10))
+    LOGIN_MAX_FAILURES_PER_IP = int(os.environ.get("LOGIN_MAX_FAILURES_PER_IP", 50))
+    
+    # Seconds a tenant snapshot (plan, status, settings, counts) is cached (0 disables)
+    TENANT_CACHE_TTL = int(os.environ.get("TENANT_CACHE_TTL", 300))
+    
+    # Outbound platform API calls: keep-alive connections per host, default
+    # timeouts in seconds, and retries of failed connections (plus 429/5xx on GETs)
+    HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 10))
+    HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5))
+    HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", 30))
+    HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", 2))
+    HTTP_RETRY_BACKOFF = float(os.environ.get("HTTP_RETRY_BACKOFF", 0.5))
+    
+    # Outbox: platform sends are queued in outbound_messages and delivered by a
+    # single `flask outbox-worker` process. Rate limits are kept in that process,
+    # so OUTBOX_WORKERS > 0 (threads in each web process) is only safe when
+    # there is one web process and no outbox-worker
+    OUTBOX_WORKERS = int(os.environ.get("OUTBOX_WORKERS", 0))
+    OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 20))
+    OUTBOX_POLL_INTERVAL = float(os.environ.get("OUTBOX_POLL_INTERVAL", 1))
+    OUTBOX_LEASE_SECONDS = int(os.environ.get("OUTBOX_LEASE_SECONDS", 120))  # Stuck 'sending' rows are retried after this
+    OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 8))  # Then the row is dead-lettered
+    OUTBOX_BACKOFF_BASE = float(os.environ.get("OUTBOX_BACKOFF_BASE", 2))
+    OUTBOX_BACKOFF_MAX = float(os.environ.get("OUTBOX_BACKOFF_MAX", 600))
+    # Sends per second for each platform and for each bot of that platform (per dispatching process)
+    OUTBOX_PLATFORM_RATE_LIMITS = _channel_map(os.environ.get("OUTBOX_PLATFORM_RATE_LIMITS", ""))
+    OUTBOX_BOT_RATE_LIMITS = _channel_map(os.environ.get("OUTBOX_BOT_RATE_LIMITS", "telegram=30,whatsapp=80,messenger=40,discord=5"))
+    
+    # Webhooks: with WEBHOOK_ASYNC_INGEST the endpoint stores the payload in
+    # inbound_webhooks and acks; WEBHOOK_WORKERS threads per process (or
+    # `flask webhook-worker`) run the processing
+    WEBHOOK_ASYNC_INGEST = os.environ.get("WEBHOOK_ASYNC_INGEST", "false").lower() == "true"
+    WEBHOOK_WORKERS = int(os.environ.get("WEBHOOK_WORKERS", 4))
+    WEBHOOK_BATCH_SIZE = int(os.environ.get("WEBHOOK_BATCH_SIZE", 20))
+    WEBHOOK_POLL_INTERVAL = float(os.environ.get("WEBHOOK_POLL_INTERVAL", 1))
+    WEBHOOK_LEASE_SECONDS = int(os.environ.get("WEBHOOK_LEASE_SECONDS", 120))
+    WEBHOOK_MAX_ATTEMPTS = int(os.environ.get("WEBHOOK_MAX_ATTEMPTS", 5))
+    WEBHOOK_BACKOFF_BASE = float(os.environ.get("WEBHOOK_BACKOFF_BASE", 1))
+    WEBHOOK_BACKOFF_MAX = float(os.environ.get("WEBHOOK_BACKOFF_MAX", 300))
+    
+    # Channel adapters built from chatbot_channels rows, cached per worker (LRU);
+    # changes made by other processes show up after ADAPTER_CACHE_TTL seconds
+    ADAPTER_CACHE_SIZE = int(os.environ.get("ADAPTER_CACHE_SIZE", 5000))
+    ADAPTER_CACHE_TTL = int(os.environ.get("ADAPTER_CACHE_TTL", 60))
+    ADAPTER_NEGATIVE_CACHE_TTL = int(os.environ.get("ADAPTER_NEGATIVE_CACHE_TTL", 10))
+    
+    # Per-process filter of recently stored inbound platform message IDs; redeliveries
+    # are dropped before any DB work (the unique index catches the rest)
+    INBOUND_DEDUP_CACHE_SIZE = int(os.environ.get("INBOUND_DEDUP_CACHE_SIZE", 20000))
+    INBOUND_DEDUP_TTL = int(os.environ.get("INBOUND_DEDUP_TTL", 900))
+    
+    # Platform user profiles (adapter get_user_info) are cached per process:
+    # PROFILE_CACHE_TTL by default, PROFILE_CACHE_TTLS overrides per channel
+    # ("telegram=3600"); unknown users for PROFILE_NEGATIVE_TTL, other failures
+    # for PROFILE_ERROR_TTL. Callers coalesced onto a running fetch wait at most
+    # PROFILE_FETCH_WAIT seconds
+    PROFILE_CACHE_SIZE = int(os.environ.get("PROFILE_CACHE_SIZE", 10000))
+    PROFILE_CACHE_TTL = int(os.environ.get("PROFILE_CACHE_TTL", 86400))
+    PROFILE_CACHE_TTLS = _channel_map(os.environ.get("PROFILE_CACHE_TTLS", ""))
+    PROFILE_NEGATIVE_TTL = int(os.environ.get("PROFILE_NEGATIVE_TTL", 3600))
+    PROFILE_ERROR_TTL = int(os.environ.get("PROFILE_ERROR_TTL", 30))
+    PROFILE_FETCH_WAIT = int(os.environ.get("PROFILE_FETCH_WAIT", 15))
+    
+    # Raise on any lazy relationship load that was not planned with a loader profile
+    STRICT_LOADING = os.environ.get("STRICT_LOADING", "false").lower() == "true"
+    
     # AI Configuration
     OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
     
@@ -3,24 +3,35 @@ import sys
 # DON\'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory, jsonify
+from flask import Flask, send_from_directory, jsonify, g, request
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from werkzeug.middleware.proxy_fix import ProxyFix
 from src.config import Config
-from src.models import db
+from src.models import (
+    db, REPLICA_BIND_PREFIX, begin_unit_of_work, configure_id_strategy, end_unit_of_work, in_unit_of_work,
+    unit_of_work_rollback_only
+)
 
 # Import all models
-from src.models.user import User
+from src.models.user import User, RevokedToken
 from src.models.tenant import Tenant, UserTenant
-from src.models.chatbot import Chatbot
-from src.models.conversation import Conversation, Message
+from src.models.chatbot import Chatbot, ChatbotStats
+from src.models.conversation import Conversation, Message, MessageArchive
 from src.models.automation import AutomationWorkflow, AutomationExecution
+from src.models.outbox import OutboundMessage
+from src.models.inbox import InboundWebhook
+import src.models.loading  # noqa: F401  (strict loading listener)
 
 # Import blueprints
 from src.routes.auth import auth_bp
 from src.routes.chatbots import chatbots_bp
 from src.routes.automations import automations_bp
 from src.routes.channels import channels_bp
+from src.cli import register_commands
+from src.migrations import check_schema
+from src.services.revocation_service import revocation_service
+from src.utils.replica import LAST_WRITE_HEADER, record_write
 
 def create_app():
     app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
@@ -28,10 +39,26 @@ def create_app():
     # Load configuration
     app.config.from_object(Config)
     
+    # Client address from the trusted proxies' X-Forwarded-* headers
+    proxies = app.config['TRUSTED_PROXY_COUNT']
+    if proxies > 0:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies, x_host=proxies)
+    
+    # Read replicas are extra binds that only RoutingSession selects
+    app.config['SQLALCHEMY_BINDS'] = {
+        **app.config.get('SQLALCHEMY_BINDS', {}),
+        **{f'{REPLICA_BIND_PREFIX}{index}': uri for index, uri in enumerate(app.config['SQLALCHEMY_REPLICA_URIS'])}
+    }
+    
     # Initialize extensions
     db.init_app(app)
+    configure_id_strategy(app.config['ID_STRATEGY'])
     jwt = JWTManager(app)
-    CORS(app, origins=app.config['CORS_ORIGINS'])
+    
+    @jwt.token_in_blocklist_loader
+    def check_token_revoked(jwt_header, jwt_payload):
+        return revocation_service.is_revoked(jwt_payload['jti'])
+    CORS(app, origins=app.config['CORS_ORIGINS'], expose_headers=[LAST_WRITE_HEADER])
     
     # Register blueprints
     app.register_blueprint(auth_bp, url_prefix='/api/v1/auth')
@@ -39,13 +66,48 @@ def create_app():
     app.register_blueprint(automations_bp, url_prefix='/api/v1/automations')
     app.register_blueprint(channels_bp, url_prefix='/api/v1/channels')
     
-    # Create database tables
+    # Request-scoped unit of work: one commit per successful request
+    if app.config['REQUEST_UNIT_OF_WORK']:
+        @app.before_request
+        def begin_request_unit_of_work():
+            begin_unit_of_work()
+        
+        @app.after_request
+        def end_request_unit_of_work(response):
+            commit = response.status_code < 400
+            if commit and unit_of_work_rollback_only():
+                # A nested unit of work raised and the route answered anyway
+                app.logger.warning(f"Rolling back {request.method} {request.path}: a nested unit of work failed")
+                commit = False
+            end_unit_of_work(commit=commit)
+            return response
+        
+        @app.teardown_request
+        def discard_request_unit_of_work(exc):
+            # Only reached with work pending when the request raised
+            while in_unit_of_work():
+                end_unit_of_work(commit=False)
+    
+    # Read-your-writes: keep a user on the primary right after they change something
+    @app.after_request
+    def track_replica_writes(response):
+        user = getattr(g, 'current_user', None)
+        if user is not None and request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            record_write(response)
+        return response
+    
+    # Register management commands
+    register_commands(app)
+    
+    # Verify the schema revision; DDL only runs through `flask db-upgrade`
     with app.app_context():
         try:
-            db.create_all()
-            print("Database tables created successfully")
+            current, head = check_schema(db.engine)
+            if current < head:
+                print(f"Database schema is at revision {current}, code expects {head}. "
+                      f"Run `flask --app src.main db-upgrade` to migrate.")
         except Exception as e:
-            print(f"Error creating database tables: {e}")
+            print(f"Error checking database schema version: {e}")
     
     # Health check endpoint
     @app.route('/api/v1/health')
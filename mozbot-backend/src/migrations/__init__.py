@@ -0,0 +1,152 @@
+"""
+Schema Migrations
+Versioned schema revisions applied by `flask --app src.main db-upgrade`.
+
+Each module in src/migrations/versions defines `revision` (an increasing
+integer), `description` and `upgrade(op)`. Revisions run in order, each in
+its own transaction together with the schema_version bump. Operations are
+idempotent so databases created by the old db.create_all() startup path can
+be brought under version control by simply upgrading.
+
+Revisions never import model code: tables, predicates and helpers they need
+are frozen copies, so a revision does the same thing however the models
+change later.
+"""
+
+import importlib
+import pkgutil
+import sqlalchemy as sa
+from sqlalchemy.schema import CreateColumn
+from src.migrations import versions
+
+schema_version_table = sa.Table(
+    'schema_version', sa.MetaData(),
+    sa.Column('version_num', sa.Integer, nullable=False)
+)
+
+class Operations:
+    """DDL helpers handed to each revision's upgrade()"""
+    
+    def __init__(self, connection):
+        self.connection = connection
+        self.dialect = connection.dialect.name
+    
+    @property
+    def inspector(self):
+        # Fresh inspector every time so earlier operations are visible
+        return sa.inspect(self.connection)
+    
+    def has_table(self, table_name):
+        return self.inspector.has_table(table_name)
+    
+    def has_column(self, table_name, column_name):
+        return any(column['name'] == column_name for column in self.inspector.get_columns(table_name))
+    
+    def has_index(self, table_name, index_name):
+        return any(index['name'] == index_name for index in self.inspector.get_indexes(table_name))
+    
+    def create_tables(self, metadata, table_names=None):
+        """Create tables from metadata that do not exist yet"""
+        tables = None
+        if table_names is not None:
+            tables = [metadata.tables[name] for name in table_names]
+        metadata.create_all(self.connection, tables=tables, checkfirst=True)
+    
+    def add_column(self, table_name, column):
+        """Add a column if it is missing; returns True when the column was added"""
+        if self.has_column(table_name, column.name):
+            return False
+        
+        column_ddl = CreateColumn(column).compile(dialect=self.connection.dialect)
+        self.execute(f'ALTER TABLE {table_name} ADD COLUMN {column_ddl}')
+        return True
+    
+    def create_index(self, index_name, table_name, columns, unique=False, where=None):
+        """Create an index if it is missing; returns True when the index was created
+        
+        where (SQL text) makes it a partial index on PostgreSQL and SQLite.
+        """
+        if self.has_index(table_name, index_name):
+            return False
+        
+        table = sa.Table(table_name, sa.MetaData(), *[sa.Column(column) for column in columns])
+        dialect_options = {}
+        if where is not None:
+            dialect_options = {'postgresql_where': sa.text(where), 'sqlite_where': sa.text(where)}
+        sa.Index(index_name, *[table.c[column] for column in columns], unique=unique, **dialect_options).create(self.connection)
+        return True
+    
+    def drop_index(self, index_name, table_name):
+        """Drop an index if it exists; returns True when the index was dropped"""
+        if not self.has_index(table_name, index_name):
+            return False
+        
+        self.execute(f'DROP INDEX {index_name}')
+        return True
+    
+    def execute(self, statement, parameters=None):
+        if isinstance(statement, str):
+            statement = sa.text(statement)
+        return self.connection.execute(statement, parameters or {})
+
+def load_revisions():
+    """Return revision modules sorted by revision number"""
+    modules = [
+        importlib.import_module(f'{versions.__name__}.{info.name}')
+        for info in pkgutil.iter_modules(versions.__path__)
+    ]
+    modules.sort(key=lambda module: module.revision)
+    
+    numbers = [module.revision for module in modules]
+    if numbers != list(range(1, len(numbers) + 1)):
+        raise RuntimeError(f'Migration revisions must be numbered 1..N without gaps, got {numbers}')
+    
+    return modules
+
+def head_revision():
+    """Latest revision shipped with the code"""
+    revisions = load_revisions()
+    return revisions[-1].revision if revisions else 0
+
+def current_revision(connection):
+    """Revision the database is at (0 if it has never been migrated)"""
+    if not sa.inspect(connection).has_table(schema_version_table.name):
+        return 0
+    
+    version = connection.execute(sa.select(schema_version_table.c.version_num)).scalar()
+    return version or 0
+
+def _set_revision(connection, revision):
+    table = schema_version_table
+    if connection.execute(sa.update(table).values(version_num=revision)).rowcount == 0:
+        connection.execute(sa.insert(table).values(version_num=revision))
+
+def upgrade(engine, target=None, echo=None):
+    """Apply pending revisions up to target (default: head); returns the applied revision numbers"""
+    with engine.begin() as connection:
+        schema_version_table.create(connection, checkfirst=True)
+        current = current_revision(connection)
+    
+    applied = []
+    for module in load_revisions():
+        if module.revision <= current or (target is not None and module.revision > target):
+            continue
+        
+        if echo:
+            echo(f'Applying revision {module.revision}: {module.description}')
+        
+        with engine.begin() as connection:
+            module.upgrade(Operations(connection))
+            _set_revision(connection, module.revision)
+        
+        applied.append(module.revision)
+    
+    return applied
+
+def check_schema(engine):
+    """Compare the database revision with head without issuing any DDL
+    
+    Returns (current, head).
+    """
+    with engine.connect() as connection:
+        return current_revision(connection), head_revision()
@@ -0,0 +1,140 @@
+"""Initial schema: the tables the models defined before versioned migrations
+
+Frozen copy of what the old db.create_all() startup path created, so later
+revisions always start from the same schema. Databases created that way
+already have these tables; create_all(checkfirst=True) leaves them untouched.
+"""
+
+import sqlalchemy as sa
+
+revision = 1
+description = 'initial schema'
+
+metadata = sa.MetaData()
+
+def base_columns():
+    """Columns every BaseModel table had"""
+    return [
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('created_at', sa.DateTime, nullable=False),
+        sa.Column('updated_at', sa.DateTime, nullable=False),
+    ]
+
+sa.Table(
+    'users', metadata, *base_columns(),
+    sa.Column('email', sa.String(255), unique=True, nullable=False),
+    sa.Column('password_hash', sa.String(255), nullable=False),
+    sa.Column('first_name', sa.String(100)),
+    sa.Column('last_name', sa.String(100)),
+    sa.Column('is_active', sa.Boolean),
+    sa.Column('email_verified', sa.Boolean),
+)
+
+sa.Table(
+    'tenants', metadata, *base_columns(),
+    sa.Column('name', sa.String(255), nullable=False),
+    sa.Column('subdomain', sa.String(100), unique=True, nullable=False),
+    sa.Column('plan_type', sa.String(50), nullable=False),
+    sa.Column('status', sa.String(20), nullable=False),
+    sa.Column('settings', sa.JSON),
+)
+
+sa.Table(
+    'user_tenants', metadata, *base_columns(),
+    sa.Column('user_id', sa.String(36), sa.ForeignKey('users.id'), nullable=False),
+    sa.Column('tenant_id', sa.String(36), sa.ForeignKey('tenants.id'), nullable=False),
+    sa.Column('role', sa.String(50), nullable=False),
+    sa.Column('permissions', sa.JSON),
+    sa.UniqueConstraint('user_id', 'tenant_id', name='unique_user_tenant'),
+)
+
+sa.Table(
+    'chatbots', metadata, *base_columns(),
+    sa.Column('tenant_id', sa.String(36), sa.ForeignKey('tenants.id'), nullable=False),
+    sa.Column('name', sa.String(255), nullable=False),
+    sa.Column('description', sa.Text),
+    sa.Column('is_active', sa.Boolean),
+    sa.Column('widget_settings', sa.JSON),
+    sa.Column('ai_settings', sa.JSON),
+    sa.Column('branding', sa.JSON),
+)
+
+sa.Table(
+    'chatbot_channels', metadata, *base_columns(),
+    sa.Column('tenant_id', sa.String(36), sa.ForeignKey('tenants.id'), nullable=False),
+    sa.Column('chatbot_id', sa.String(36), sa.ForeignKey('chatbots.id'), nullable=False),
+    sa.Column('channel_type', sa.String(50), nullable=False),
+    sa.Column('channel_config', sa.JSON),
+    sa.Column('is_active', sa.Boolean),
+)
+
+sa.Table(
+    'knowledge_articles', metadata, *base_columns(),
+    sa.Column('tenant_id', sa.String(36), sa.ForeignKey('tenants.id'), nullable=False),
+    sa.Column('chatbot_id', sa.String(36), sa.ForeignKey('chatbots.id'), nullable=False),
+    sa.Column('title', sa.String(500), nullable=False),
+    sa.Column('content', sa.Text, nullable=False),
+    sa.Column('tags', sa.JSON),
+    sa.Column('category', sa.String(100)),
+    sa.Column('is_active', sa.Boolean),
+)
+
+sa.Table(
+    'faqs', metadata, *base_columns(),
+    sa.Column('tenant_id', sa.String(36), sa.ForeignKey('tenants.id'), nullable=False),
+    sa.Column('chatbot_id', sa.String(36), sa.ForeignKey('chatbots.id'), nullable=False),
+    sa.Column('question', sa.Text, nullable=False),
+    sa.Column('answer', sa.Text, nullable=False),
+    sa.Column('category', sa.String(100)),
+    sa.Column('priority', sa.Integer),
+    sa.Column('is_active', sa.Boolean),
+)
+
+sa.Table(
+    'conversations', metadata, *base_columns(),
+    sa.Column('tenant_id', sa.String(36), sa.ForeignKey('tenants.id'), nullable=False),
+    sa.Column('chatbot_id', sa.String(36), sa.ForeignKey('chatbots.id'), nullable=False),
+    sa.Column('channel_type', sa.String(50), nullable=False),
+    sa.Column('channel_user_id', sa.String(255), nullable=False),
+    sa.Column('status', sa.String(50)),
+    sa.Column('meta_data', sa.JSON),
+    sa.Column('started_at', sa.DateTime),
+    sa.Column('ended_at', sa.DateTime),
+)
+
+sa.Table(
+    'messages', metadata, *base_columns(),
+    sa.Column('tenant_id', sa.String(36), sa.ForeignKey('tenants.id'), nullable=False),
+    sa.Column('conversation_id', sa.String(36), sa.ForeignKey('conversations.id'), nullable=False),
+    sa.Column('sender_type', sa.String(20), nullable=False),
+    sa.Column('sender_id', sa.String(255)),
+    sa.Column('content', sa.Text, nullable=False),
+    sa.Column('message_type', sa.String(50)),
+    sa.Column('meta_data', sa.JSON),
+)
+
+sa.Table(
+    'automation_workflows', metadata, *base_columns(),
+    sa.Column('tenant_id', sa.String(36), sa.ForeignKey('tenants.id'), nullable=False),
+    sa.Column('chatbot_id', sa.String(36), sa.ForeignKey('chatbots.id'), nullable=False),
+    sa.Column('name', sa.String(255), nullable=False),
+    sa.Column('description', sa.Text),
+    sa.Column('trigger_events', sa.JSON, nullable=False),
+    sa.Column('webhook_url', sa.String(500)),
+    sa.Column('is_active', sa.Boolean),
+    sa.Column('configuration', sa.JSON),
+)
+
+sa.Table(
+    'automation_executions', metadata, *base_columns(),
+    sa.Column('tenant_id', sa.String(36), sa.ForeignKey('tenants.id'), nullable=False),
+    sa.Column('workflow_id', sa.String(36), sa.ForeignKey('automation_workflows.id'), nullable=False),
+    sa.Column('trigger_event', sa.String(100), nullable=False),
+    sa.Column('payload', sa.JSON),
+    sa.Column('status', sa.String(50), nullable=False),
+    sa.Column('response', sa.JSON),
+    sa.Column('executed_at', sa.DateTime),
+)
+
+def upgrade(op):
+    op.create_tables(metadata)
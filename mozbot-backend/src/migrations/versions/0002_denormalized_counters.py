@@ -0,0 +1,86 @@
+"""Conversation summary columns and chatbot_stats counters, with backfill"""
+
+import sqlalchemy as sa
+
+revision = 2
+description = 'conversation summary columns and chatbot_stats backfill'
+
+metadata = sa.MetaData()
+
+chatbot_stats = sa.Table(
+    'chatbot_stats', metadata,
+    sa.Column('chatbot_id', sa.String(36), sa.ForeignKey('chatbots.id', ondelete='CASCADE'), primary_key=True),
+    sa.Column('total_conversations', sa.Integer, nullable=False),
+    sa.Column('active_channels', sa.Integer, nullable=False),
+    sa.Column('knowledge_articles', sa.Integer, nullable=False),
+    sa.Column('faqs', sa.Integer, nullable=False),
+    sa.Column('updated_at', sa.DateTime, nullable=False),
+)
+# Only for create_all's dependency check; 0001 creates the real table
+sa.Table('chatbots', metadata, sa.Column('id', sa.String(36), primary_key=True))
+
+# Frozen copy of the chatbot counters as of this revision:
+# source table -> (counter, boolean column that must be true to count)
+COUNTED_TABLES = {
+    'conversations': ('total_conversations', None),
+    'chatbot_channels': ('active_channels', 'is_active'),
+    'knowledge_articles': ('knowledge_articles', None),
+    'faqs': ('faqs', None),
+}
+
+def count_chatbot_stats(connection, chatbot_ids):
+    """Counter values for chatbot_ids, one grouped COUNT query per source table"""
+    stats = {chatbot_id: {counter: 0 for counter, _ in COUNTED_TABLES.values()} for chatbot_id in chatbot_ids}
+    
+    for table_name, (counter, flag) in COUNTED_TABLES.items():
+        table = sa.table(table_name, sa.column('id'), sa.column('chatbot_id'), *([sa.column(flag)] if flag else []))
+        query = sa.select(table.c.chatbot_id, sa.func.count(table.c.id)).where(table.c.chatbot_id.in_(chatbot_ids))
+        if flag:
+            query = query.where(table.c[flag].is_(True))
+        
+        for chatbot_id, count in connection.execute(query.group_by(table.c.chatbot_id)):
+            stats[chatbot_id][counter] = count
+    
+    return stats
+
+def upgrade(op):
+    op.create_tables(metadata, ['chatbot_stats'])
+    
+    op.add_column('messages', sa.Column('platform_message_id', sa.String(255)))
+    
+    added = [
+        op.add_column('conversations', sa.Column('message_count', sa.Integer, nullable=False, server_default='0')),
+        op.add_column('conversations', sa.Column('last_message_content', sa.Text)),
+        op.add_column('conversations', sa.Column('last_message_sender', sa.String(20))),
+        op.add_column('conversations', sa.Column('last_message_at', sa.DateTime)),
+    ]
+    
+    if any(added):
+        latest = (
+            'SELECT {column} FROM messages m WHERE m.conversation_id = conversations.id '
+            'ORDER BY m.created_at DESC, m.id DESC LIMIT 1'
+        )
+        op.execute(
+            'UPDATE conversations SET '
+            'message_count = (SELECT COUNT(*) FROM messages m WHERE m.conversation_id = conversations.id), '
+            f'last_message_content = ({latest.format(column="m.content")}), '
+            f'last_message_sender = ({latest.format(column="m.sender_type")}), '
+            f'last_message_at = ({latest.format(column="m.created_at")})'
+        )
+    
+    # Counter rows for chatbots created before chatbot_stats existed
+    missing = [row[0] for row in op.execute(
+        'SELECT c.id FROM chatbots c LEFT JOIN chatbot_stats s ON s.chatbot_id = c.id '
+        'WHERE s.chatbot_id IS NULL'
+    )]
+    
+    for offset in range(0, len(missing), 500):
+        counts = count_chatbot_stats(op.connection, missing[offset:offset + 500])
+        op.execute(
+            sa.text(
+                'INSERT INTO chatbot_stats (chatbot_id, total_conversations, active_channels, '
+                'knowledge_articles, faqs, updated_at) VALUES (:chatbot_id, :total_conversations, '
+                ':active_channels, :knowledge_articles, :faqs, CURRENT_TIMESTAMP)'
+            ),
+            [dict(chatbot_id=chatbot_id, **values) for chatbot_id, values in counts.items()]
+        )
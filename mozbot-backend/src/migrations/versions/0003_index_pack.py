@@ -0,0 +1,33 @@
+"""Secondary indexes for the hot tenant-scoped queries"""
+
+revision = 3
+description = 'production index pack'
+
+INDEXES = [
+    # Inbox listing, filtered by channel and status, newest first
+    ('ix_conversations_tenant_channel_status_updated', 'conversations', ['tenant_id', 'channel_type', 'status', 'updated_at']),
+    ('ix_conversations_tenant_status_updated', 'conversations', ['tenant_id', 'status', 'updated_at']),
+    # Webhook lookup of the active conversation for a platform user
+    ('ix_conversations_tenant_channel_user', 'conversations', ['tenant_id', 'channel_type', 'channel_user_id', 'status']),
+    ('ix_conversations_tenant_created', 'conversations', ['tenant_id', 'created_at']),
+    ('ix_conversations_chatbot_id', 'conversations', ['chatbot_id']),
+    # Conversation scrollback and analytics windows
+    ('ix_messages_conversation_created', 'messages', ['conversation_id', 'created_at']),
+    ('ix_messages_tenant_created', 'messages', ['tenant_id', 'created_at']),
+    ('ix_chatbots_tenant_created', 'chatbots', ['tenant_id', 'created_at']),
+    ('ix_chatbot_channels_tenant_channel', 'chatbot_channels', ['tenant_id', 'channel_type']),
+    ('ix_chatbot_channels_chatbot_id', 'chatbot_channels', ['chatbot_id']),
+    ('ix_knowledge_articles_tenant_chatbot', 'knowledge_articles', ['tenant_id', 'chatbot_id']),
+    ('ix_knowledge_articles_chatbot_id', 'knowledge_articles', ['chatbot_id']),
+    ('ix_faqs_tenant_chatbot', 'faqs', ['tenant_id', 'chatbot_id']),
+    ('ix_faqs_chatbot_id', 'faqs', ['chatbot_id']),
+    ('ix_user_tenants_tenant_id', 'user_tenants', ['tenant_id']),
+    ('ix_automation_workflows_tenant_active', 'automation_workflows', ['tenant_id', 'is_active']),
+    ('ix_automation_workflows_chatbot_id', 'automation_workflows', ['chatbot_id']),
+    ('ix_automation_executions_workflow_status', 'automation_executions', ['workflow_id', 'status']),
+    ('ix_automation_executions_tenant_executed', 'automation_executions', ['tenant_id', 'executed_at']),
+]
+
+def upgrade(op):
+    for index_name, table_name, columns in INDEXES:
+        op.create_index(index_name, table_name, columns)
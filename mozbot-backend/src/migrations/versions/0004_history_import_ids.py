@@ -0,0 +1,14 @@
+"""External IDs for idempotent history imports"""
+
+import sqlalchemy as sa
+
+revision = 4
+description = 'external ids for history import'
+
+def upgrade(op):
+    op.add_column('conversations', sa.Column('external_id', sa.String(255)))
+    op.add_column('messages', sa.Column('external_id', sa.String(255)))
+    
+    # NULLs are distinct, so rows created by the live channels are unaffected
+    op.create_index('uq_conversations_tenant_external_id', 'conversations', ['tenant_id', 'external_id'], unique=True)
+    op.create_index('uq_messages_tenant_external_id', 'messages', ['tenant_id', 'external_id'], unique=True)
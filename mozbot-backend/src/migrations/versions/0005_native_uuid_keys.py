@@ -0,0 +1,38 @@
+"""Native uuid keys for conversations and messages on PostgreSQL"""
+
+import sqlalchemy as sa
+
+revision = 5
+description = 'native uuid keys for conversations and messages'
+
+def upgrade(op):
+    # Other databases keep the 36-character string form
+    if op.dialect != 'postgresql':
+        return
+    
+    if all(isinstance(column['type'], sa.Uuid)
+           for column in op.inspector.get_columns('messages')
+           if column['name'] in ('id', 'conversation_id')):
+        return
+    
+    # The foreign key has to go while both sides change type
+    foreign_keys = [
+        fk for fk in op.inspector.get_foreign_keys('messages')
+        if fk['referred_table'] == 'conversations'
+    ]
+    for fk in foreign_keys:
+        op.execute(f'ALTER TABLE messages DROP CONSTRAINT {fk["name"]}')
+    
+    # Existing UUID4 strings convert in place and keep their values;
+    # rows inserted from now on get time-ordered IDs
+    op.execute('ALTER TABLE conversations ALTER COLUMN id TYPE uuid USING id::uuid')
+    op.execute(
+        'ALTER TABLE messages '
+        'ALTER COLUMN id TYPE uuid USING id::uuid, '
+        'ALTER COLUMN conversation_id TYPE uuid USING conversation_id::uuid'
+    )
+    
+    op.execute(
+        'ALTER TABLE messages ADD CONSTRAINT messages_conversation_id_fkey '
+        'FOREIGN KEY (conversation_id) REFERENCES conversations (id)'
+    )
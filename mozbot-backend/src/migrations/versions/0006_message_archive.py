@@ -0,0 +1,27 @@
+"""Archive tier for messages of old resolved conversations"""
+
+import sqlalchemy as sa
+
+revision = 6
+description = 'message archive tier'
+
+# conversations.id is native uuid on PostgreSQL since revision 5
+UUID_KEY = sa.String(36).with_variant(sa.Uuid(as_uuid=False), 'postgresql')
+
+metadata = sa.MetaData()
+
+sa.Table(
+    'message_archives', metadata,
+    sa.Column('conversation_id', UUID_KEY, sa.ForeignKey('conversations.id', ondelete='CASCADE'), primary_key=True),
+    sa.Column('tenant_id', sa.String(36), sa.ForeignKey('tenants.id'), nullable=False),
+    sa.Column('message_count', sa.Integer, nullable=False),
+    sa.Column('payload', sa.LargeBinary, nullable=False),
+    sa.Column('archived_at', sa.DateTime, nullable=False),
+)
+# Referenced tables, only for create_all's dependency check
+sa.Table('conversations', metadata, sa.Column('id', UUID_KEY, primary_key=True))
+sa.Table('tenants', metadata, sa.Column('id', sa.String(36), primary_key=True))
+
+def upgrade(op):
+    op.add_column('conversations', sa.Column('archived_at', sa.DateTime))
+    op.create_tables(metadata, ['message_archives'])
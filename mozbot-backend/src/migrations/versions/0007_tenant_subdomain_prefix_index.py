@@ -0,0 +1,12 @@
+"""Prefix-searchable index on tenants.subdomain for subdomain allocation"""
+
+revision = 7
+description = 'tenant subdomain prefix index'
+
+def upgrade(op):
+    # The unique index already serves LIKE 'prefix%' on SQLite and C-collation
+    # databases; PostgreSQL with a locale collation needs text_pattern_ops
+    if op.dialect != 'postgresql':
+        return
+    
+    op.execute('CREATE INDEX IF NOT EXISTS ix_tenants_subdomain_pattern ON tenants (subdomain text_pattern_ops)')
@@ -0,0 +1,22 @@
+"""Revoked JWT denylist"""
+
+import sqlalchemy as sa
+
+revision = 8
+description = 'revoked tokens'
+
+metadata = sa.MetaData()
+
+sa.Table(
+    'revoked_tokens', metadata,
+    sa.Column('jti', sa.String(64), primary_key=True),
+    sa.Column('user_id', sa.String(36)),
+    sa.Column('token_type', sa.String(10), nullable=False),
+    sa.Column('expires_at', sa.DateTime, nullable=False),
+    sa.Column('revoked_at', sa.DateTime, nullable=False),
+    sa.Index('ix_revoked_tokens_revoked_at', 'revoked_at'),
+    sa.Index('ix_revoked_tokens_expires_at', 'expires_at'),
+)
+
+def upgrade(op):
+    op.create_tables(metadata)
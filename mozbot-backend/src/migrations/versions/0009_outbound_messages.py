@@ -0,0 +1,37 @@
+"""Outbox of platform sends drained by the outbox workers"""
+
+import sqlalchemy as sa
+
+revision = 9
+description = 'outbound messages'
+
+# messages.id is native uuid on PostgreSQL since revision 5
+UUID_KEY = sa.String(36).with_variant(sa.Uuid(as_uuid=False), 'postgresql')
+
+metadata = sa.MetaData()
+
+sa.Table(
+    'outbound_messages', metadata,
+    sa.Column('id', sa.String(36), primary_key=True),
+    sa.Column('created_at', sa.DateTime, nullable=False),
+    sa.Column('updated_at', sa.DateTime, nullable=False),
+    sa.Column('tenant_id', sa.String(36), sa.ForeignKey('tenants.id'), nullable=False),
+    sa.Column('channel_type', sa.String(50), nullable=False),
+    sa.Column('recipient_id', sa.String(255), nullable=False),
+    sa.Column('content', sa.Text, nullable=False),
+    sa.Column('options', sa.JSON),
+    sa.Column('message_id', UUID_KEY, sa.ForeignKey('messages.id', ondelete='SET NULL')),
+    sa.Column('status', sa.String(20), nullable=False),
+    sa.Column('attempts', sa.Integer, nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime, nullable=False),
+    sa.Column('locked_until', sa.DateTime),
+    sa.Column('last_error', sa.Text),
+    sa.Index('ix_outbound_messages_status_next_attempt', 'status', 'next_attempt_at'),
+    sa.Index('ix_outbound_messages_tenant_status', 'tenant_id', 'status'),
+)
+# Referenced tables, only for create_all's dependency check
+sa.Table('tenants', metadata, sa.Column('id', sa.String(36), primary_key=True))
+sa.Table('messages', metadata, sa.Column('id', UUID_KEY, primary_key=True))
+
+def upgrade(op):
+    op.create_tables(metadata, ['outbound_messages'])
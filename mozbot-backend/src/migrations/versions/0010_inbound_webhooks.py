@@ -0,0 +1,32 @@
+"""Durable queue of acknowledged webhooks for asynchronous ingestion"""
+
+import sqlalchemy as sa
+
+revision = 10
+description = 'inbound webhooks'
+
+metadata = sa.MetaData()
+
+sa.Table(
+    'inbound_webhooks', metadata,
+    sa.Column('id', sa.String(36), primary_key=True),
+    sa.Column('created_at', sa.DateTime, nullable=False),
+    sa.Column('updated_at', sa.DateTime, nullable=False),
+    sa.Column('tenant_id', sa.String(36), sa.ForeignKey('tenants.id'), nullable=False),
+    sa.Column('channel_type', sa.String(50), nullable=False),
+    sa.Column('payload', sa.JSON, nullable=False),
+    sa.Column('sender_key', sa.String(400)),
+    sa.Column('received_at', sa.DateTime, nullable=False),
+    sa.Column('status', sa.String(20), nullable=False),
+    sa.Column('attempts', sa.Integer, nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime, nullable=False),
+    sa.Column('locked_until', sa.DateTime),
+    sa.Column('last_error', sa.Text),
+    sa.Index('ix_inbound_webhooks_status_next_attempt', 'status', 'next_attempt_at'),
+    sa.Index('ix_inbound_webhooks_sender_received', 'sender_key', 'received_at'),
+)
+# Referenced table, only for create_all's dependency check
+sa.Table('tenants', metadata, sa.Column('id', sa.String(36), primary_key=True))
+
+def upgrade(op):
+    op.create_tables(metadata, ['inbound_webhooks'])
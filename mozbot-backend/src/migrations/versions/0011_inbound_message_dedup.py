@@ -0,0 +1,60 @@
+"""Unique platform message IDs for inbound messages
+
+Backfills messages.channel_type for inbound rows, moves Telegram IDs to the
+chat-scoped "chat_id:message_id" form the adapter now reports, and clears
+the platform ID of duplicates already stored (keeping the earliest) so the
+unique index can be built.
+"""
+
+import sqlalchemy as sa
+
+revision = 11
+description = 'inbound message dedup'
+
+# Frozen copy of conversation.INBOUND_MESSAGE_PREDICATE as of this revision
+INBOUND_MESSAGE_PREDICATE = "sender_type = 'user'"
+
+# Chat of a stored Telegram message: the raw update is kept in meta_data.platform_data
+TELEGRAM_CHAT_ID = {
+    'postgresql': "(meta_data -> 'platform_data' -> 'chat' ->> 'id')",
+    'sqlite': "json_extract(meta_data, '$.platform_data.chat.id')",
+}
+
+def upgrade(op):
+    op.add_column('messages', sa.Column('channel_type', sa.String(50)))
+    
+    op.execute(f"""
+        UPDATE messages
+        SET channel_type = (SELECT c.channel_type FROM conversations c WHERE c.id = messages.conversation_id)
+        WHERE channel_type IS NULL AND {INBOUND_MESSAGE_PREDICATE} AND platform_message_id IS NOT NULL
+          AND external_id IS NULL
+    """)
+    
+    # Take the chat from the stored update (the sender is not the chat in groups);
+    # rows without one keep their bare ID, which can never match the new form
+    chat_id = TELEGRAM_CHAT_ID.get(op.dialect, TELEGRAM_CHAT_ID['sqlite'])
+    op.execute(f"""
+        UPDATE messages
+        SET platform_message_id = {chat_id} || ':' || platform_message_id
+        WHERE channel_type = 'telegram' AND {INBOUND_MESSAGE_PREDICATE} AND platform_message_id NOT LIKE '%:%'
+          AND {chat_id} IS NOT NULL
+    """)
+    
+    op.execute(f"""
+        UPDATE messages
+        SET platform_message_id = NULL
+        WHERE {INBOUND_MESSAGE_PREDICATE} AND platform_message_id IS NOT NULL AND EXISTS (
+            SELECT 1 FROM messages earlier
+            WHERE earlier.tenant_id = messages.tenant_id
+              AND earlier.channel_type = messages.channel_type
+              AND earlier.platform_message_id = messages.platform_message_id
+              AND earlier.sender_type = 'user'
+              AND (earlier.created_at < messages.created_at
+                   OR (earlier.created_at = messages.created_at AND earlier.id < messages.id))
+        )
+    """)
+    
+    op.create_index(
+        'uq_messages_inbound_platform_id', 'messages', ['tenant_id', 'channel_type', 'platform_message_id'],
+        unique=True, where=INBOUND_MESSAGE_PREDICATE
+    )
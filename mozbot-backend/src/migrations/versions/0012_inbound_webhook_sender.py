@@ -0,0 +1,13 @@
+"""Per-sender inbound webhook rows
+
+Multi-sender batches are queued once per sender so every sender's webhooks
+stay ordered; sender_id picks that sender's events out of the shared payload.
+"""
+
+import sqlalchemy as sa
+
+revision = 12
+description = 'inbound webhook sender'
+
+def upgrade(op):
+    op.add_column('inbound_webhooks', sa.Column('sender_id', sa.String(255)))
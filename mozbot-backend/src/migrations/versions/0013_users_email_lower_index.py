@@ -0,0 +1,7 @@
+"""Expression index for case-insensitive login lookups on users.email"""
+
+revision = 13
+description = 'users lower(email) index'
+
+def upgrade(op):
+    op.execute('CREATE INDEX IF NOT EXISTS ix_users_email_lower ON users (lower(email))')
@@ -0,0 +1,12 @@
+"""Scope imported message external IDs to their conversation"""
+
+revision = 14
+description = 'message external ids unique per conversation'
+
+def upgrade(op):
+    # Exports number messages per conversation; a tenant-wide key dropped
+    # message "5" of every conversation after the first
+    op.create_index(
+        'uq_messages_conversation_external_id', 'messages', ['conversation_id', 'external_id'], unique=True
+    )
+    op.drop_index('uq_messages_tenant_external_id', 'messages')
@@ -0,0 +1 @@
+# Schema revisions, applied in order of their `revision` number
@@ -1,12 +1,225 @@
 from flask_sqlalchemy import SQLAlchemy
+from contextlib import contextmanager
 from datetime import datetime
+from operator import attrgetter, itemgetter
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.types import String, TypeDecorator, Uuid
+from src.models.routing import REPLICA_BIND_PREFIX, RoutingSession, replica_bind_keys
+import os
+import random
+import time
 import uuid
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+ID_STRATEGIES = ('uuid4', 'uuid7')
+_id_strategy = 'uuid4'
+
+def configure_id_strategy(strategy):
+    """Select how generate_uuid() builds new primary keys ('uuid4' or 'uuid7')"""
+    global _id_strategy
+    if strategy not in ID_STRATEGIES:
+        raise ValueError(f'Unknown ID strategy: {strategy}')
+    _id_strategy = strategy
 
 def generate_uuid():
+    if _id_strategy == 'uuid7':
+        return generate_uuid7()
     return str(uuid.uuid4())
 
+def generate_uuid7():
+    """Time-ordered UUID (version 7 layout): 48-bit Unix milliseconds followed by random bits
+    
+    New keys sort after older ones, so inserts append to the end of the
+    primary key index instead of landing on random pages.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), 'big')
+    value = value & ~(0xF << 76) | 0x7 << 76  # version 7
+    value = value & ~(0x3 << 62) | 0x2 << 62  # RFC 4122 variant
+    return str(uuid.UUID(int=value))
+
+class UUIDString(TypeDecorator):
+    """UUID column: native uuid (16 bytes) on PostgreSQL, String(36) elsewhere; always a str in Python"""
+    impl = String(36)
+    cache_ok = True
+    
+    @property
+    def python_type(self):
+        return str
+    
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(Uuid(as_uuid=False))
+        return dialect.type_descriptor(String(36))
+    
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name != 'postgresql':
+            return value
+        try:
+            return str(uuid.UUID(str(value)))
+        except ValueError:
+            # Malformed IDs from URLs match no rows instead of failing the query
+            return None
+
+def replicas_configured():
+    """Whether any read replica bind is configured for the current app"""
+    return bool(replica_bind_keys(db.engines))
+
+@contextmanager
+def replica_reads():
+    """Send SELECTs inside the block to a read replica (no-op without replicas)
+    
+    One replica is picked per block so its reads see a consistent snapshot.
+    Writes still go to the primary, so only use this around read-only work.
+    """
+    previous = db.session.info.get('replica_bind_key')
+    replicas = replica_bind_keys(db.engines)
+    if replicas and previous is None:
+        db.session.info['replica_bind_key'] = random.choice(replicas)
+    try:
+        yield
+    finally:
+        if previous is None:
+            db.session.info.pop('replica_bind_key', None)
+
+class UnitOfWorkRolledBack(RuntimeError):
+    """The outermost unit of work rolled back because a nested one failed"""
+
+def in_unit_of_work():
+    """Whether save()/delete() should flush instead of committing"""
+    return db.session.info.get('unit_of_work_depth', 0) > 0
+
+def unit_of_work_rollback_only():
+    """Whether a nested unit of work failed, so the outermost one must not commit"""
+    return db.session.info.get('unit_of_work_rollback_only', False)
+
+def begin_unit_of_work():
+    """Enter a unit of work; nested calls join the outermost one"""
+    db.session.info['unit_of_work_depth'] = db.session.info.get('unit_of_work_depth', 0) + 1
+
+def end_unit_of_work(commit=True):
+    """Leave a unit of work; the outermost one commits or rolls back
+    
+    A nested unit left with commit=False marks the outermost one
+    rollback-only: its partial writes are still pending in the session, so
+    the outermost unit rolls back instead of committing them. A
+    session.rollback() (the caller dealt with the failure) clears the mark.
+    Returns whether the outermost unit committed.
+    """
+    info = db.session.info
+    depth = info.get('unit_of_work_depth', 0)
+    if depth <= 0:
+        return False
+    
+    info['unit_of_work_depth'] = depth - 1
+    if depth > 1:
+        if not commit:
+            info['unit_of_work_rollback_only'] = True
+        return False
+    
+    if unit_of_work_rollback_only():
+        commit = False
+    
+    if commit:
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    else:
+        db.session.rollback()
+    return commit
+
+@contextmanager
+def unit_of_work():
+    """Run a block as one transaction with a single commit at the end
+    
+    Raises UnitOfWorkRolledBack when the outermost block finishes normally
+    but a nested one failed and its exception was swallowed.
+    """
+    begin_unit_of_work()
+    try:
+        yield db.session
+    except BaseException:
+        end_unit_of_work(commit=False)
+        raise
+    
+    outermost = db.session.info['unit_of_work_depth'] == 1
+    if not end_unit_of_work(commit=True) and outermost:
+        raise UnitOfWorkRolledBack('A nested unit of work failed; nothing was committed')
+
+@event.listens_for(Session, 'after_rollback')
+def _clear_rollback_only(session):
+    # The nested unit's partial writes are gone with the transaction
+    session.info.pop('unit_of_work_rollback_only', None)
+
+def savepoint():
+    """Nested transaction usable as a context manager inside a unit of work"""
+    return db.session.begin_nested()
+
+class ModelSerializer:
+    """Column serializer built once per model class
+    
+    The field list, getters and the positions of DateTime columns are
+    computed up front. Loaded rows are read straight from the instance
+    __dict__ with one itemgetter call; rows with expired or deferred
+    attributes fall back to regular attribute access so they still load.
+    Columns named in the model's __serialize_exclude__ are left out.
+    """
+    
+    def __init__(self, model):
+        exclude = set(getattr(model, '__serialize_exclude__', ()))
+        columns = [column for column in model.__table__.columns if column.name not in exclude]
+        
+        self.fields = tuple(column.name for column in columns)
+        self.datetime_positions = tuple(
+            position for position, column in enumerate(columns)
+            if isinstance(column.type, db.DateTime)
+        )
+        self.attribute_getter = attrgetter(*self.fields)
+        self.dict_getter = itemgetter(*self.fields)
+        self.single_field = len(self.fields) == 1
+    
+    def serialize(self, obj):
+        try:
+            values = self.dict_getter(obj.__dict__)
+        except KeyError:
+            values = self.attribute_getter(obj)
+        if self.single_field:
+            # The getters return a bare value rather than a tuple for one field
+            values = (values,)
+        return self._format(values)
+    
+    def serialize_many(self, rows):
+        serialize = self.serialize
+        return [serialize(row) for row in rows]
+    
+    def serialize_row(self, row):
+        """Serialize a Core result row (e.g. from INSERT ... RETURNING)"""
+        values = self.dict_getter(row._mapping)
+        if self.single_field:
+            values = (values,)
+        return self._format(values)
+    
+    def _format(self, values):
+        if self.datetime_positions:
+            values = list(values)
+            for position in self.datetime_positions:
+                value = values[position]
+                if value is not None:
+                    values[position] = value.isoformat() + 'Z'
+        return dict(zip(self.fields, values))
+
+_serializers = {}
+
+def serializer_for(model):
+    """Return the cached ModelSerializer for a model class"""
+    serializer = _serializers.get(model)
+    if serializer is None:
+        serializer = _serializers[model] = ModelSerializer(model)
+    return serializer
+
 class BaseModel(db.Model):
     __abstract__ = True
     
@@ -16,23 +229,33 @@ class BaseModel(db.Model):
     
     def to_dict(self):
         """Convert model instance to dictionary"""
-        result = {}
-        for column in self.__table__.columns:
-            value = getattr(self, column.name)
-            if isinstance(value, datetime):
-                value = value.isoformat() + 'Z'
-            result[column.name] = value
-        return result
+        return serializer_for(type(self)).serialize(self)
+    
+    @classmethod
+    def serialize_many(cls, rows):
+        """Column dictionaries for many rows, equivalent to BaseModel.to_dict on each"""
+        return serializer_for(cls).serialize_many(rows)
+    
+    @classmethod
+    def row_to_dict(cls, row):
+        """Column dictionary for a Core result row of this model's table"""
+        return serializer_for(cls).serialize_row(row)
     
     def save(self):
-        """Save the model to database"""
+        """Save the model to database (flush only inside a unit of work)"""
         db.session.add(self)
-        db.session.commit()
+        if in_unit_of_work():
+            db.session.flush()
+        else:
+            db.session.commit()
         return self
     
     def delete(self):
-        """Delete the model from database"""
+        """Delete the model from database (flush only inside a unit of work)"""
         db.session.delete(self)
-        db.session.commit()
+        if in_unit_of_work():
+            db.session.flush()
+        else:
+            db.session.commit()
         return True
 
@@ -3,6 +3,10 @@ from datetime import datetime
 
 class AutomationWorkflow(BaseModel):
     __tablename__ = 'automation_workflows'
+    __table_args__ = (
+        db.Index('ix_automation_workflows_tenant_active', 'tenant_id', 'is_active'),
+        db.Index('ix_automation_workflows_chatbot_id', 'chatbot_id'),
+    )
     
     tenant_id = db.Column(db.String(36), db.ForeignKey('tenants.id'), nullable=False)
     chatbot_id = db.Column(db.String(36), db.ForeignKey('chatbots.id'), nullable=False)
@@ -57,6 +61,10 @@ class AutomationWorkflow(BaseModel):
 
 class AutomationExecution(BaseModel):
     __tablename__ = 'automation_executions'
+    __table_args__ = (
+        db.Index('ix_automation_executions_workflow_status', 'workflow_id', 'status'),
+        db.Index('ix_automation_executions_tenant_executed', 'tenant_id', 'executed_at'),
+    )
     
     tenant_id = db.Column(db.String(36), db.ForeignKey('tenants.id'), nullable=False)
     workflow_id = db.Column(db.String(36), db.ForeignKey('automation_workflows.id'), nullable=False)
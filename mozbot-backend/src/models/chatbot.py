@@ -1,7 +1,13 @@
 from src.models import db, BaseModel
+from datetime import datetime
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
 
 class Chatbot(BaseModel):
     __tablename__ = 'chatbots'
+    __table_args__ = (
+        db.Index('ix_chatbots_tenant_created', 'tenant_id', 'created_at'),
+    )
     
     tenant_id = db.Column(db.String(36), db.ForeignKey('tenants.id'), nullable=False)
     name = db.Column(db.String(255), nullable=False)
@@ -22,27 +28,29 @@ class Chatbot(BaseModel):
     def __repr__(self):
         return f'<Chatbot {self.name}>'
     
-    def to_dict(self, include_stats=False):
+    def to_dict(self, include_stats=False, stats=None):
         data = super().to_dict()
         
         if include_stats:
-            data['stats'] = {
-                'total_conversations': len(self.conversations) if self.conversations else 0,
-                'active_channels': len([c for c in self.channels if c.is_active]) if self.channels else 0,
-                'knowledge_articles': len(self.knowledge_articles) if self.knowledge_articles else 0,
-                'faqs': len(self.faqs) if self.faqs else 0
-            }
+            if stats is None:
+                stats = load_chatbot_stats([self.id])[self.id]
+            data['stats'] = stats
         
         return data
 
 class ChatbotChannel(BaseModel):
     __tablename__ = 'chatbot_channels'
+    __table_args__ = (
+        db.Index('ix_chatbot_channels_tenant_channel', 'tenant_id', 'channel_type'),
+        db.Index('ix_chatbot_channels_chatbot_id', 'chatbot_id'),
+    )
     
     tenant_id = db.Column(db.String(36), db.ForeignKey('tenants.id'), nullable=False)
     chatbot_id = db.Column(db.String(36), db.ForeignKey('chatbots.id'), nullable=False)
     channel_type = db.Column(db.String(50), nullable=False)  # 'web', 'telegram', 'whatsapp', 'messenger'
     channel_config = db.Column(db.JSON, default={})
-    is_active = db.Column(db.Boolean, default=True)
+    # active_history keeps the old value around so toggles adjust chatbot_stats
+    is_active = db.column_property(db.Column(db.Boolean, default=True), active_history=True)
     
     # Relationships
     chatbot = db.relationship('Chatbot', back_populates='channels')
@@ -52,6 +60,10 @@ class ChatbotChannel(BaseModel):
 
 class KnowledgeArticle(BaseModel):
     __tablename__ = 'knowledge_articles'
+    __table_args__ = (
+        db.Index('ix_knowledge_articles_tenant_chatbot', 'tenant_id', 'chatbot_id'),
+        db.Index('ix_knowledge_articles_chatbot_id', 'chatbot_id'),
+    )
     
     tenant_id = db.Column(db.String(36), db.ForeignKey('tenants.id'), nullable=False)
     chatbot_id = db.Column(db.String(36), db.ForeignKey('chatbots.id'), nullable=False)
@@ -69,6 +81,10 @@ class KnowledgeArticle(BaseModel):
 
 class FAQ(BaseModel):
     __tablename__ = 'faqs'
+    __table_args__ = (
+        db.Index('ix_faqs_tenant_chatbot', 'tenant_id', 'chatbot_id'),
+        db.Index('ix_faqs_chatbot_id', 'chatbot_id'),
+    )
     
     tenant_id = db.Column(db.String(36), db.ForeignKey('tenants.id'), nullable=False)
     chatbot_id = db.Column(db.String(36), db.ForeignKey('chatbots.id'), nullable=False)
@@ -84,3 +100,180 @@ class FAQ(BaseModel):
     def __repr__(self):
         return f'<FAQ {self.question[:50]}>'
 
+class ChatbotStats(db.Model):
+    """Per-chatbot counters maintained in the same transaction as the rows they count"""
+    __tablename__ = 'chatbot_stats'
+    
+    chatbot_id = db.Column(db.String(36), db.ForeignKey('chatbots.id', ondelete='CASCADE'), primary_key=True)
+    total_conversations = db.Column(db.Integer, nullable=False, default=0)
+    active_channels = db.Column(db.Integer, nullable=False, default=0)
+    knowledge_articles = db.Column(db.Integer, nullable=False, default=0)
+    faqs = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    
+    COUNTERS = ('total_conversations', 'active_channels', 'knowledge_articles', 'faqs')
+    
+    def __repr__(self):
+        return f'<ChatbotStats {self.chatbot_id}>'
+    
+    def to_dict(self):
+        return {counter: getattr(self, counter) for counter in self.COUNTERS}
+
+def _empty_stats():
+    return {counter: 0 for counter in ChatbotStats.COUNTERS}
+
+def _counted_models():
+    """Map each counted model to (counter, boolean column that must be true to count)"""
+    from src.models.conversation import Conversation
+    
+    return {
+        Conversation: ('total_conversations', None),
+        ChatbotChannel: ('active_channels', 'is_active'),
+        KnowledgeArticle: ('knowledge_articles', None),
+        FAQ: ('faqs', None)
+    }
+
+def count_chatbot_stats(chatbot_ids, executor=None):
+    """Compute stats from the source tables with one grouped COUNT query per table"""
+    executor = executor or db.session
+    chatbot_ids = list(chatbot_ids)
+    stats = {chatbot_id: _empty_stats() for chatbot_id in chatbot_ids}
+    
+    if not chatbot_ids:
+        return stats
+    
+    for model, (counter, flag) in _counted_models().items():
+        query = select(model.chatbot_id, func.count(model.id)).where(
+            model.chatbot_id.in_(chatbot_ids)
+        )
+        if flag:
+            query = query.where(getattr(model, flag).is_(True))
+        
+        for chatbot_id, count in executor.execute(query.group_by(model.chatbot_id)):
+            stats[chatbot_id][counter] = count
+    
+    return stats
+
+def load_chatbot_stats(chatbot_ids):
+    """Load stats for many chatbots from the chatbot_stats counter table
+    
+    Chatbots without a counter row (created before the table existed and
+    not yet rebuilt) fall back to grouped COUNT queries.
+    """
+    chatbot_ids = list(chatbot_ids)
+    stats = {}
+    
+    if chatbot_ids:
+        for row in ChatbotStats.query.filter(ChatbotStats.chatbot_id.in_(chatbot_ids)):
+            stats[row.chatbot_id] = row.to_dict()
+    
+    missing = [chatbot_id for chatbot_id in chatbot_ids if chatbot_id not in stats]
+    stats.update(count_chatbot_stats(missing))
+    
+    return stats
+
+def rebuild_chatbot_stats(chatbot_ids=None, batch_size=500):
+    """Recompute counter rows from scratch; returns the number of chatbots rebuilt"""
+    if chatbot_ids is None:
+        chatbot_ids = [row[0] for row in db.session.query(Chatbot.id)]
+    else:
+        chatbot_ids = list(chatbot_ids)
+    
+    for offset in range(0, len(chatbot_ids), batch_size):
+        batch = chatbot_ids[offset:offset + batch_size]
+        counts = count_chatbot_stats(batch)
+        
+        ChatbotStats.query.filter(ChatbotStats.chatbot_id.in_(batch)).delete(synchronize_session=False)
+        db.session.add_all(ChatbotStats(chatbot_id=chatbot_id, **values) for chatbot_id, values in counts.items())
+        db.session.commit()
+    
+    return len(chatbot_ids)
+
+def _previous_value(obj, attr):
+    """Value of attr as last loaded from the database"""
+    history = inspect(obj).attrs[attr].history
+    return history.deleted[0] if history.deleted else getattr(obj, attr)
+
+def _contribution(obj, flag, previous=False):
+    """chatbot_id the object is counted against, or None if it is not counted"""
+    value = _previous_value if previous else getattr
+    if flag and not value(obj, flag):
+        return None
+    return value(obj, 'chatbot_id')
+
+def _add_delta(deltas, chatbot_id, counter, amount):
+    if chatbot_id is not None:
+        counters = deltas.setdefault(chatbot_id, {})
+        counters[counter] = counters.get(counter, 0) + amount
+
+@event.listens_for(Session, 'before_flush')
+def _collect_chatbot_stats_deltas(session, flush_context, instances):
+    """Record deltas for deleted and toggled rows while their old state is still loadable"""
+    counted = _counted_models()
+    deltas = {}
+    
+    for obj in session.deleted:
+        if type(obj) in counted:
+            counter, flag = counted[type(obj)]
+            _add_delta(deltas, _contribution(obj, flag, previous=True), counter, -1)
+    
+    for obj in session.dirty:
+        if type(obj) in counted and session.is_modified(obj, include_collections=False):
+            counter, flag = counted[type(obj)]
+            before = _contribution(obj, flag, previous=True)
+            after = _contribution(obj, flag)
+            if before != after:
+                _add_delta(deltas, before, counter, -1)
+                _add_delta(deltas, after, counter, 1)
+    
+    session.info['chatbot_stats_deltas'] = deltas
+
+@event.listens_for(Session, 'after_flush')
+def _apply_chatbot_stats_deltas(session, flush_context):
+    """Apply counter deltas in the same transaction as the flushed rows"""
+    counted = _counted_models()
+    deltas = session.info.pop('chatbot_stats_deltas', {})
+    
+    # Inserts are counted here so column defaults such as is_active are populated
+    for obj in session.new:
+        if type(obj) in counted:
+            counter, flag = counted[type(obj)]
+            _add_delta(deltas, _contribution(obj, flag), counter, 1)
+    
+    created_chatbots = [obj.id for obj in session.new if isinstance(obj, Chatbot)]
+    deleted_chatbots = {obj.id for obj in session.deleted if isinstance(obj, Chatbot)}
+    
+    if not (created_chatbots or deleted_chatbots or deltas):
+        return
+    
+    connection = session.connection()
+    table = ChatbotStats.__table__
+    now = datetime.utcnow()
+    
+    if created_chatbots:
+        connection.execute(table.insert(), [
+            dict(chatbot_id=chatbot_id, updated_at=now, **_empty_stats())
+            for chatbot_id in created_chatbots
+        ])
+    
+    if deleted_chatbots:
+        connection.execute(table.delete().where(table.c.chatbot_id.in_(deleted_chatbots)))
+    
+    missing = []
+    for chatbot_id, counters in deltas.items():
+        values = {counter: table.c[counter] + amount for counter, amount in counters.items() if amount}
+        if chatbot_id in deleted_chatbots or not values:
+            continue
+        
+        result = connection.execute(
+            table.update().where(table.c.chatbot_id == chatbot_id).values(updated_at=now, **values)
+        )
+        if result.rowcount == 0:
+            missing.append(chatbot_id)
+    
+    if missing:
+        # Source tables already include this flush, so a fresh count is exact
+        connection.execute(table.insert(), [
+            dict(chatbot_id=chatbot_id, updated_at=now, **values)
+            for chatbot_id, values in count_chatbot_stats(missing, executor=connection).items()
+        ])
@@ -1,9 +1,22 @@
-from src.models import db, BaseModel
+from src.models import db, BaseModel, UUIDString, generate_uuid
 from datetime import datetime
+from operator import attrgetter
+from sqlalchemy import func, inspect, select, text, update
+import json
+import zlib
 
 class Conversation(BaseModel):
     __tablename__ = 'conversations'
+    __table_args__ = (
+        db.Index('ix_conversations_tenant_channel_status_updated', 'tenant_id', 'channel_type', 'status', 'updated_at'),
+        db.Index('ix_conversations_tenant_status_updated', 'tenant_id', 'status', 'updated_at'),
+        db.Index('ix_conversations_tenant_channel_user', 'tenant_id', 'channel_type', 'channel_user_id', 'status'),
+        db.Index('ix_conversations_tenant_created', 'tenant_id', 'created_at'),
+        db.Index('ix_conversations_chatbot_id', 'chatbot_id'),
+        db.Index('uq_conversations_tenant_external_id', 'tenant_id', 'external_id', unique=True),
+    )
     
+    id = db.Column(UUIDString, primary_key=True, default=generate_uuid)
     tenant_id = db.Column(db.String(36), db.ForeignKey('tenants.id'), nullable=False)
     chatbot_id = db.Column(db.String(36), db.ForeignKey('chatbots.id'), nullable=False)
     channel_type = db.Column(db.String(50), nullable=False)
@@ -12,10 +25,21 @@ class Conversation(BaseModel):
     meta_data = db.Column(db.JSON, default={})
     started_at = db.Column(db.DateTime, default=datetime.utcnow)
     ended_at = db.Column(db.DateTime)
+    external_id = db.Column(db.String(255))  # ID on the platform the history was imported from
+    
+    # Denormalized summary of the latest message, kept current by add_message
+    message_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_message_content = db.Column(db.Text)
+    last_message_sender = db.Column(db.String(20))
+    last_message_at = db.Column(db.DateTime)
+    
+    # Set when the messages were moved into message_archives
+    archived_at = db.Column(db.DateTime)
     
     # Relationships
     chatbot = db.relationship('Chatbot', back_populates='conversations')
     messages = db.relationship('Message', back_populates='conversation', cascade='all, delete-orphan', order_by='Message.created_at')
+    archive = db.relationship('MessageArchive', uselist=False, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Conversation {self.id}>'
@@ -24,32 +48,147 @@ class Conversation(BaseModel):
         data = super().to_dict()
         
         if include_messages:
-            data['messages'] = [message.to_dict() for message in self.messages]
+            data['messages'] = Message.serialize_many(self.get_messages())
         else:
             # Include last message for conversation list
-            if self.messages:
-                last_message = self.messages[-1]
-                data['last_message'] = {
-                    'content': last_message.content,
-                    'sender_type': last_message.sender_type,
-                    'created_at': last_message.created_at.isoformat() + 'Z'
-                }
+            last_message = self.last_message_dict()
+            if last_message:
+                data['last_message'] = last_message
         
         return data
     
-    def add_message(self, sender_type, content, sender_id=None, message_type='text', meta_data=None):
+    @classmethod
+    def row_to_dict(cls, row):
+        """Same shape as to_dict() for a Core result row of the conversations table"""
+        data = super().row_to_dict(row)
+        last_message = cls.summary_to_dict(row.last_message_content, row.last_message_sender, row.last_message_at)
+        if last_message:
+            data['last_message'] = last_message
+        return data
+    
+    def last_message_dict(self):
+        """Latest message from the denormalized summary columns"""
+        return self.summary_to_dict(self.last_message_content, self.last_message_sender, self.last_message_at)
+    
+    @staticmethod
+    def summary_to_dict(content, sender_type, created_at):
+        """last_message dict for the given summary column values (None without a message)"""
+        if not created_at:
+            return None
+        
+        return {
+            'content': content,
+            'sender_type': sender_type,
+            'created_at': created_at.isoformat() + 'Z'
+        }
+    
+    def get_messages(self):
+        """All messages in order, including those moved to the archive tier"""
+        if not self.archived_at or self.archive is None:
+            return list(self.messages)
+        
+        messages = self.archive.load_messages() + list(self.messages)
+        messages.sort(key=attrgetter('created_at', 'id'))
+        return messages
+    
+    def add_message(self, sender_type, content, sender_id=None, message_type='text', meta_data=None,
+                    platform_message_id=None):
         """Add a new message to the conversation"""
         message = Message(
             tenant_id=self.tenant_id,
             conversation_id=self.id,
+            channel_type=self.channel_type,
             sender_type=sender_type,
             sender_id=sender_id,
             content=content,
             message_type=message_type,
-            meta_data=meta_data or {}
+            platform_message_id=platform_message_id,
+            meta_data=meta_data or {},
+            created_at=datetime.utcnow()
         )
+        db.session.add(message)
+        self.record_message(message)
+        
+        # The message insert and the summary update commit together
         return message.save()
     
+    def record_message(self, message):
+        """Update the summary columns for a message added to this conversation"""
+        values = self.summary_values(message.content, message.sender_type, message.created_at)
+        
+        if not inspect(self).persistent:
+            # Not inserted yet, so there is no row to increment in SQL
+            values['message_count'] = (self.message_count or 0) + 1
+        
+        for key, value in values.items():
+            setattr(self, key, value)
+    
+    @classmethod
+    def summary_values(cls, content, sender_type, created_at):
+        """Column values that record a new message in the summary columns
+        
+        message_count is incremented in SQL so concurrent writers do not
+        lose counts.
+        """
+        return {
+            'message_count': cls.message_count + 1,
+            'last_message_content': content,
+            'last_message_sender': sender_type,
+            'last_message_at': created_at,
+            'updated_at': created_at
+        }
+    
+    @classmethod
+    def rebuild_summaries(cls, conversation_ids=None, batch_size=500):
+        """Recompute summary columns from the messages table; returns the number of conversations rebuilt"""
+        query = db.session.query(cls.id)
+        if conversation_ids is not None:
+            query = query.filter(cls.id.in_(list(conversation_ids)))
+        ids = [row[0] for row in query]
+        
+        for offset in range(0, len(ids), batch_size):
+            batch = ids[offset:offset + batch_size]
+            
+            counts = dict(db.session.execute(
+                select(Message.conversation_id, func.count(Message.id))
+                .where(Message.conversation_id.in_(batch))
+                .group_by(Message.conversation_id)
+            ).all())
+            
+            latest = (
+                select(Message.conversation_id, func.max(Message.created_at).label('created_at'))
+                .where(Message.conversation_id.in_(batch))
+                .group_by(Message.conversation_id)
+                .subquery()
+            )
+            last_messages = {
+                message.conversation_id: message
+                for message in Message.query.join(
+                    latest,
+                    (Message.conversation_id == latest.c.conversation_id) &
+                    (Message.created_at == latest.c.created_at)
+                )
+            }
+            
+            for conversation_id in batch:
+                last_message = last_messages.get(conversation_id)
+                db.session.execute(
+                    update(cls.__table__)
+                    .where(cls.__table__.c.id == conversation_id)
+                    .values(
+                        message_count=counts.get(conversation_id, 0),
+                        last_message_content=last_message.content if last_message else None,
+                        last_message_sender=last_message.sender_type if last_message else None,
+                        last_message_at=last_message.created_at if last_message else None,
+                        # Keep the inbox ordering untouched
+                        updated_at=cls.__table__.c.updated_at
+                    )
+                )
+            
+            db.session.commit()
+        
+        return len(ids)
+    
     def mark_resolved(self):
         """Mark conversation as resolved"""
         self.status = 'resolved'
@@ -61,16 +200,37 @@ class Conversation(BaseModel):
         self.status = 'escalated'
         return self.save()
 
+# Rows covered by uq_messages_inbound_platform_id; outbound IDs (e.g. Telegram's
+# per-chat message_id of our replies) are not unique per channel
+INBOUND_MESSAGE_PREDICATE = "sender_type = 'user'"
+
 class Message(BaseModel):
     __tablename__ = 'messages'
+    __table_args__ = (
+        db.Index('ix_messages_conversation_created', 'conversation_id', 'created_at'),
+        db.Index('ix_messages_tenant_created', 'tenant_id', 'created_at'),
+        # Exports number messages per conversation, so IDs only need to be unique within one
+        db.Index('uq_messages_conversation_external_id', 'conversation_id', 'external_id', unique=True),
+        # Platform redeliveries of an inbound message cannot be stored twice
+        db.Index(
+            'uq_messages_inbound_platform_id', 'tenant_id', 'channel_type', 'platform_message_id',
+            unique=True,
+            postgresql_where=text(INBOUND_MESSAGE_PREDICATE),
+            sqlite_where=text(INBOUND_MESSAGE_PREDICATE)
+        ),
+    )
     
+    id = db.Column(UUIDString, primary_key=True, default=generate_uuid)
     tenant_id = db.Column(db.String(36), db.ForeignKey('tenants.id'), nullable=False)
-    conversation_id = db.Column(db.String(36), db.ForeignKey('conversations.id'), nullable=False)
+    conversation_id = db.Column(UUIDString, db.ForeignKey('conversations.id'), nullable=False)
+    channel_type = db.Column(db.String(50))  # Channel of live messages (NULL for imported history); scopes platform_message_id
     sender_type = db.Column(db.String(20), nullable=False)  # 'user', 'bot', 'agent'
     sender_id = db.Column(db.String(255))
+    platform_message_id = db.Column(db.String(255))  # Message ID on the originating platform
     content = db.Column(db.Text, nullable=False)
     message_type = db.Column(db.String(50), default='text')  # 'text', 'image', 'file', 'quick_reply'
     meta_data = db.Column(db.JSON, default={})
+    external_id = db.Column(db.String(255))  # ID on the platform the history was imported from
     
     # Relationships
     conversation = db.relationship('Conversation', back_populates='messages')
@@ -78,3 +238,44 @@ class Message(BaseModel):
     def __repr__(self):
         return f'<Message {self.id}>'
 
+
+class MessageArchive(db.Model):
+    """Messages of an archived conversation, stored as one compressed blob"""
+    __tablename__ = 'message_archives'
+    
+    conversation_id = db.Column(UUIDString, db.ForeignKey('conversations.id', ondelete='CASCADE'), primary_key=True)
+    tenant_id = db.Column(db.String(36), db.ForeignKey('tenants.id'), nullable=False)
+    message_count = db.Column(db.Integer, nullable=False, default=0)
+    payload = db.Column(db.LargeBinary, nullable=False)  # zlib-compressed JSON list of message rows
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    DATETIME_COLUMNS = ('created_at', 'updated_at')
+    
+    def __repr__(self):
+        return f'<MessageArchive {self.conversation_id}>'
+    
+    @classmethod
+    def pack(cls, rows):
+        """Compress message rows (mappings of column values) into a payload"""
+        values = []
+        for row in rows:
+            row = dict(row)
+            for key in cls.DATETIME_COLUMNS:
+                if row.get(key) is not None:
+                    row[key] = row[key].isoformat()
+            values.append(row)
+        return zlib.compress(json.dumps(values, separators=(',', ':')).encode(), 6)
+    
+    @classmethod
+    def unpack(cls, payload):
+        """Message rows stored in a payload, with timestamps parsed back"""
+        rows = json.loads(zlib.decompress(payload))
+        for row in rows:
+            for key in cls.DATETIME_COLUMNS:
+                if row.get(key) is not None:
+                    row[key] = datetime.fromisoformat(row[key])
+        return rows
+    
+    def load_messages(self):
+        """Archived messages as detached Message instances, oldest first"""
+        return [Message(**row) for row in self.unpack(self.payload)]
@@ -0,0 +1,31 @@
+from src.models import db, BaseModel
+from datetime import datetime
+
+class InboundWebhook(BaseModel):
+    """Raw platform webhook acknowledged by the endpoint and waiting for a worker
+    
+    Rows are deleted once processed; 'dead' rows stay for inspection and
+    can be put back with `flask requeue-dead-letters`.
+    """
+    __tablename__ = 'inbound_webhooks'
+    __table_args__ = (
+        db.Index('ix_inbound_webhooks_status_next_attempt', 'status', 'next_attempt_at'),
+        db.Index('ix_inbound_webhooks_sender_received', 'sender_key', 'received_at'),
+    )
+    
+    tenant_id = db.Column(db.String(36), db.ForeignKey('tenants.id'), nullable=False)
+    channel_type = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    # tenant:channel:user; webhooks of one sender are processed one at a time, in order
+    sender_key = db.Column(db.String(400))
+    # Only this sender's events of the payload are ingested (None: all of them)
+    sender_id = db.Column(db.String(255))
+    received_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'processing', 'dead'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime)  # Lease of the worker currently processing it
+    last_error = db.Column(db.Text)
+    
+    def __repr__(self):
+        return f'<InboundWebhook {self.id}>'
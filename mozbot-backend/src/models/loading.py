@@ -0,0 +1,66 @@
+"""
+Loader Profiles
+Named eager-loading option sets for queries, and a strict mode in which
+any lazy load that reaches the database raises instead of running.
+
+Apply a profile with query.options(*loader_profile('user_with_tenants')).
+Strict mode is on when STRICT_LOADING is set (tests and staging); code
+that deliberately lazy-loads can opt out with allow_lazy_loads().
+"""
+
+from contextlib import contextmanager
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import Session, selectinload
+from src.models import db
+from src.models.user import User
+from src.models.tenant import UserTenant
+
+LOADER_PROFILES = {
+    # User.to_dict(include_tenants=True) in login and /me
+    'user_with_tenants': lambda: (
+        selectinload(User.tenants).joinedload(UserTenant.tenant),
+    ),
+}
+
+class UnplannedLazyLoad(InvalidRequestError):
+    """A relationship was lazy-loaded while strict loading is enabled"""
+
+def loader_profile(*names):
+    """Loader options for one or more named profiles"""
+    options = []
+    for name in names:
+        if name not in LOADER_PROFILES:
+            raise ValueError(f'Unknown loader profile: {name}')
+        options.extend(LOADER_PROFILES[name]())
+    return options
+
+def strict_loading_enabled(session):
+    if session.info.get('allow_lazy_loads', 0) > 0:
+        return False
+    return has_app_context() and current_app.config.get('STRICT_LOADING', False)
+
+@contextmanager
+def allow_lazy_loads():
+    """Permit lazy loads inside the block even in strict mode"""
+    db.session.info['allow_lazy_loads'] = db.session.info.get('allow_lazy_loads', 0) + 1
+    try:
+        yield
+    finally:
+        db.session.info['allow_lazy_loads'] -= 1
+
+@event.listens_for(Session, 'do_orm_execute')
+def _raise_on_lazy_load(execute_state):
+    # Identity-map hits never get here; only loads that would emit SQL do
+    if not execute_state.is_select or execute_state.lazy_loaded_from is None:
+        return
+    if not strict_loading_enabled(execute_state.session):
+        return
+    
+    path = execute_state.loader_strategy_path
+    relationship = path[-1] if path is not None and len(path) else 'relationship'
+    raise UnplannedLazyLoad(
+        f'Lazy load of {relationship} on {execute_state.lazy_loaded_from.object!r} '
+        f'with strict loading enabled; add it to a loader profile'
+    )
@@ -0,0 +1,30 @@
+from src.models import db, BaseModel, UUIDString
+from datetime import datetime
+
+class OutboundMessage(BaseModel):
+    """Platform send waiting for (or given up on by) the outbox workers
+    
+    Rows are deleted once delivered; 'dead' rows stay for inspection and
+    can be put back with `flask requeue-dead-letters`.
+    """
+    __tablename__ = 'outbound_messages'
+    __table_args__ = (
+        db.Index('ix_outbound_messages_status_next_attempt', 'status', 'next_attempt_at'),
+        db.Index('ix_outbound_messages_tenant_status', 'tenant_id', 'status'),
+    )
+    
+    tenant_id = db.Column(db.String(36), db.ForeignKey('tenants.id'), nullable=False)
+    channel_type = db.Column(db.String(50), nullable=False)
+    recipient_id = db.Column(db.String(255), nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    options = db.Column(db.JSON, default={})  # Adapter kwargs (reply_markup, parse_mode, template)
+    # Stored message this send delivers; gets the platform message id once sent
+    message_id = db.Column(UUIDString, db.ForeignKey('messages.id', ondelete='SET NULL'))
+    status = db.Column(db.String(20), nullable=False, default='pending')  # 'pending', 'processing', 'dead'
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime)  # Lease of the worker currently sending it
+    last_error = db.Column(db.Text)
+    
+    def __repr__(self):
+        return f'<OutboundMessage {self.id}>'
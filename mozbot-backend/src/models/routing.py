@@ -0,0 +1,26 @@
+"""
+Read Replica Routing
+Session class that sends SELECTs to a replica while replica reads are enabled
+"""
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import Select
+
+REPLICA_BIND_PREFIX = 'replica_'
+
+def replica_bind_keys(engines):
+    """Bind keys of the configured replicas"""
+    return sorted(key for key in engines if key and key.startswith(REPLICA_BIND_PREFIX))
+
+class RoutingSession(Session):
+    """Session that routes plain SELECTs to session.info['replica_bind_key'] when set
+    
+    Flushes, INSERT/UPDATE/DELETE and explicit binds always use the primary.
+    """
+    
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get('replica_bind_key')
+        if (replica and bind is None and not self._flushing
+                and isinstance(clause, Select) and clause._for_update_arg is None):
+            return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
@@ -1,5 +1,7 @@
 from src.models import db, BaseModel
+from sqlalchemy import func, select
 from sqlalchemy.dialects.postgresql import UUID
+import re
 import uuid
 
 class Tenant(BaseModel):
@@ -18,11 +20,53 @@ class Tenant(BaseModel):
     def __repr__(self):
         return f'<Tenant {self.name}>'
     
-    def to_dict(self):
+    def to_dict(self, counts=None):
         data = super().to_dict()
-        data['chatbot_count'] = len(self.chatbots) if self.chatbots else 0
-        data['user_count'] = len(self.users) if self.users else 0
+        data.update(counts if counts is not None else load_tenant_counts([self.id])[self.id])
         return data
+    
+    @classmethod
+    def subdomain_base(cls, name):
+        """Subdomain stem derived from a tenant name"""
+        base = re.sub(r'[^a-zA-Z0-9]', '', name.lower())[:20]
+        return base if len(base) >= 3 else 'tenant'
+    
+    @classmethod
+    def allocate_subdomain(cls, base):
+        """First free subdomain among base, base1, base2, ... found with one prefix query
+        
+        Concurrent signups can still pick the same value; the unique
+        constraint on subdomain catches that and the caller retries.
+        """
+        pattern = re.compile(rf'^{re.escape(base)}(\d*)$')
+        taken = set()
+        for (subdomain,) in db.session.query(cls.subdomain).filter(cls.subdomain.startswith(base, autoescape=True)):
+            match = pattern.match(subdomain)
+            if match:
+                taken.add(int(match.group(1)) if match.group(1) else 0)
+        
+        if 0 not in taken:
+            return base
+        
+        suffix = 1
+        while suffix in taken:
+            suffix += 1
+        return f'{base}{suffix}'
+
+def load_tenant_counts(tenant_ids):
+    """chatbot_count/user_count per tenant from grouped COUNTs, without loading relationships"""
+    from src.models.chatbot import Chatbot
+    
+    counts = {tenant_id: {'chatbot_count': 0, 'user_count': 0} for tenant_id in tenant_ids}
+    for model, key in ((Chatbot, 'chatbot_count'), (UserTenant, 'user_count')):
+        rows = db.session.execute(
+            select(model.tenant_id, func.count())
+            .where(model.tenant_id.in_(tenant_ids))
+            .group_by(model.tenant_id)
+        )
+        for tenant_id, count in rows:
+            counts[tenant_id][key] = count
+    return counts
 
 class UserTenant(BaseModel):
     __tablename__ = 'user_tenants'
@@ -36,8 +80,11 @@ class UserTenant(BaseModel):
     user = db.relationship('User', back_populates='tenants')
     tenant = db.relationship('Tenant', back_populates='users')
     
-    # Unique constraint
-    __table_args__ = (db.UniqueConstraint('user_id', 'tenant_id', name='unique_user_tenant'),)
+    # Constraints and indexes
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'tenant_id', name='unique_user_tenant'),
+        db.Index('ix_user_tenants_tenant_id', 'tenant_id'),
+    )
     
     def __repr__(self):
         return f'<UserTenant {self.user_id}:{self.tenant_id}>'
@@ -1,10 +1,13 @@
 from src.models import db, BaseModel
+from flask import current_app
+from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token, create_refresh_token
 import bcrypt
 
 class User(BaseModel):
     __tablename__ = 'users'
+    __serialize_exclude__ = ('password_hash',)  # Never include password hash
     
     email = db.Column(db.String(255), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
@@ -21,7 +24,7 @@ class User(BaseModel):
     
     def set_password(self, password):
         """Hash and set password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, current_app.config['PASSWORD_HASH_METHOD'])
     
     def check_password(self, password):
         """Check if provided password matches hash"""
@@ -78,3 +81,23 @@ class User(BaseModel):
         user.set_password(password)
         return user.save()
 
+# Case-insensitive login lookup: func.lower(User.email) == normalized address
+db.Index('ix_users_email_lower', db.func.lower(User.email))
+
+
+class RevokedToken(db.Model):
+    """JWT revoked before its expiry (logout); rows are pruned once the token expires"""
+    __tablename__ = 'revoked_tokens'
+    __table_args__ = (
+        db.Index('ix_revoked_tokens_revoked_at', 'revoked_at'),
+        db.Index('ix_revoked_tokens_expires_at', 'expires_at'),
+    )
+    
+    jti = db.Column(db.String(64), primary_key=True)
+    user_id = db.Column(db.String(36))
+    token_type = db.Column(db.String(10), nullable=False, default='access')
+    expires_at = db.Column(db.DateTime, nullable=False)
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<RevokedToken {self.jti}>'
@@ -1,14 +1,33 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
+from flask import Blueprint, current_app, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity, create_access_token, decode_token
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from src.models.user import User
 from src.models.tenant import Tenant, UserTenant
-from src.models import db
+from src.models import db, savepoint, unit_of_work
+from src.models.loading import loader_profile
+from src.services.password_service import PasswordServiceBusy, password_service
+from src.services.revocation_service import revocation_service
 from src.utils.auth import validate_json
+from src.utils.throttle import AttemptThrottle
 from src.utils.responses import success_response, error_response, validation_error_response, conflict_response
+from datetime import datetime
 import re
 
 auth_bp = Blueprint('auth', __name__)
 
+# Subdomain allocations tried before giving up on concurrent signups
+SUBDOMAIN_ATTEMPTS = 5
+
+def get_login_throttle():
+    """Failed-login counters of the current app, windowed by its LOGIN_THROTTLE_WINDOW"""
+    throttle = current_app.extensions.get('login_throttle')
+    if throttle is None:
+        throttle = current_app.extensions.setdefault(
+            'login_throttle', AttemptThrottle(window=current_app.config['LOGIN_THROTTLE_WINDOW'])
+        )
+    return throttle
+
 def validate_email(email):
     """Validate email format"""
     pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
@@ -50,50 +69,51 @@ def register():
     if User.find_by_email(data['email']):
         return conflict_response('User with this email already exists')
     
-    # Generate subdomain from tenant name
-    subdomain = re.sub(r'[^a-zA-Z0-9]', '', data['tenant_name'].lower())[:20]
-    if len(subdomain) < 3:
-        subdomain = f"tenant{User.query.count() + 1}"
+    # Hash outside the transaction, in the password pool
+    try:
+        password_hash = password_service.hash(data['password'])
+    except PasswordServiceBusy:
+        return error_response('Registration is temporarily unavailable, try again shortly', code='BUSY', status_code=503)
     
-    # Check if subdomain is taken
-    counter = 1
-    original_subdomain = subdomain
-    while Tenant.query.filter_by(subdomain=subdomain).first():
-        subdomain = f"{original_subdomain}{counter}"
-        counter += 1
+    subdomain_base = Tenant.subdomain_base(data['tenant_name'])
     
     try:
-        # Create user
-        user = User.create_user(
-            email=data['email'],
-            password=data['password'],
-            first_name=data['first_name'],
-            last_name=data['last_name']
-        )
-        
-        # Create tenant
-        tenant = Tenant(
-            name=data['tenant_name'],
-            subdomain=subdomain,
-            plan_type='basic',
-            status='active'
-        )
-        tenant.save()
-        
-        # Associate user with tenant as owner
-        user_tenant = UserTenant(
-            user_id=user.id,
-            tenant_id=tenant.id,
-            role='owner'
-        )
-        user_tenant.save()
+        # User, tenant and owner membership commit together or not at all
+        with unit_of_work():
+            user = User(
+                email=data['email'],
+                password_hash=password_hash,
+                first_name=data['first_name'],
+                last_name=data['last_name']
+            )
+            tenant = Tenant(
+                name=data['tenant_name'],
+                plan_type='basic',
+                status='active'
+            )
+            user.tenants = [UserTenant(tenant=tenant, role='owner')]
+            
+            for attempt in range(SUBDOMAIN_ATTEMPTS):
+                tenant.subdomain = Tenant.allocate_subdomain(subdomain_base)
+                try:
+                    with savepoint():
+                        db.session.add(user)
+                        db.session.flush()
+                    break
+                except IntegrityError:
+                    # Lost a race: either the email or the subdomain was just taken
+                    if User.find_by_email(data['email']):
+                        return conflict_response('User with this email already exists')
+            else:
+                return error_response('Could not allocate a subdomain, please retry', code='CONFLICT', status_code=409)
         
         # Generate tokens
         tokens = user.generate_tokens()
         
+        # A brand-new tenant has no chatbots and only its owner; skip the COUNT queries
         return success_response({
             'user': user.to_dict(include_tenants=True),
-            'tenant': tenant.to_dict(),
+            'tenant': tenant.to_dict(counts={'chatbot_count': 0, 'user_count': 1}),
             **tokens
         }, status_code=201)
         
@@ -107,14 +127,46 @@ def login():
     """Authenticate user and return tokens"""
     data = request.json
     
-    user = User.find_by_email(data['email'])
+    if not isinstance(data['email'], str) or not isinstance(data['password'], str):
+        return error_response('Email and password must be strings', status_code=400)
     
-    if not user or not user.check_password(data['password']):
+    # One normalized address for the throttle key and the lookup
+    email = data['email'].strip().lower()
+    
+    # Throttle failed attempts per account and per client IP before any hashing
+    throttle_keys = {
+        f"account:{email}": current_app.config['LOGIN_MAX_FAILURES_PER_ACCOUNT'],
+        f"ip:{request.remote_addr}": current_app.config['LOGIN_MAX_FAILURES_PER_IP']
+    }
+    login_throttle = get_login_throttle()
+    retry_after = login_throttle.retry_after(throttle_keys)
+    if retry_after:
+        response, status = error_response('Too many failed login attempts, try again later', code='RATE_LIMITED', status_code=429)
+        response.headers['Retry-After'] = str(retry_after)
+        return response, status
+    
+    user = User.query.options(*loader_profile('user_with_tenants')).filter(func.lower(User.email) == email).first()
+    
+    try:
+        valid = user is not None and password_service.verify(user.password_hash, data['password'])
+    except PasswordServiceBusy:
+        return error_response('Login is temporarily unavailable, try again shortly', code='BUSY', status_code=503)
+    
+    if not valid:
+        login_throttle.record_failure(*throttle_keys)
         return error_response('Invalid email or password', status_code=401)
     
     if not user.is_active:
         return error_response('Account is deactivated', status_code=401)
     
+    # Upgrade hashes made with older parameters while we have the plaintext
+    if password_service.needs_rehash(user.password_hash):
+        try:
+            user.password_hash = password_service.hash(data['password'])
+            user.save()
+        except PasswordServiceBusy:
+            pass  # Try again on a later login
+    
     tokens = user.generate_tokens()
     
     return success_response({
@@ -143,7 +195,7 @@ def refresh():
 def get_current_user():
     """Get current user profile"""
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = User.query.options(*loader_profile('user_with_tenants')).get(current_user_id)
     
     if not user:
         return error_response('User not found', status_code=404)
@@ -155,7 +207,30 @@ def get_current_user():
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    """Logout user (client should discard tokens)"""
+    """Logout user by revoking the access token (and the refresh token, if sent)"""
+    claims = get_jwt()
+    revocation_service.revoke(
+        claims['jti'],
+        datetime.utcfromtimestamp(claims['exp']),
+        user_id=get_jwt_identity(),
+        token_type=claims.get('type', 'access')
+    )
+    
+    data = request.get_json(silent=True) or {}
+    if data.get('refresh_token'):
+        try:
+            refresh_claims = decode_token(data['refresh_token'])
+        except Exception:
+            return error_response('Invalid refresh token', status_code=400)
+        
+        if refresh_claims.get('sub') == get_jwt_identity():
+            revocation_service.revoke(
+                refresh_claims['jti'],
+                datetime.utcfromtimestamp(refresh_claims['exp']),
+                user_id=refresh_claims['sub'],
+                token_type='refresh'
+            )
+    
     return success_response({'message': 'Successfully logged out'})
 
 @auth_bp.route('/forgot-password', methods=['POST'])
@@ -587,9 +587,8 @@ def check_trigger_conditions(workflow, conversation, trigger_data):
                 value = condition.get('value')
                 
                 if field == 'message_count':
-                    message_count = Message.query.filter_by(
-                        conversation_id=conversation.id
-                    ).count()
+                    # Summary column also counts archived messages
+                    message_count = conversation.message_count
                     
                     if not evaluate_condition(message_count, operator, value):
                         return False
@@ -1,9 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify, g
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.models import unit_of_work
 from src.services.channel_service import channel_service
 from src.models.chatbot import Chatbot
 from src.models.conversation import Conversation, Message
-from src.utils.auth import tenant_required
+from src.utils.auth import (
+    tenant_required, cursor_paginate_query, cursor_paginate_items, paginate_items,
+    wants_cursor_pagination, wants_total
+)
+from src.utils.replica import read_replica
 from src.utils.responses import success_response, error_response
 import json
 
@@ -27,7 +32,7 @@ def register_channel():
     """Register a new communication channel for the tenant"""
     try:
         user_id = get_jwt_identity()
-        tenant_id = request.tenant_id
+        tenant_id = g.current_tenant.id
         data = request.get_json()
         
         # Validate required fields
@@ -40,7 +45,7 @@ def register_channel():
         config = data['config']
         
         # Register channel
-        result = channel_service.register_channel(tenant_id, channel_type, config)
+        result = channel_service.register_channel(tenant_id, channel_type, config, data.get('chatbot_id'))
         
         if result['success']:
             return success_response({
@@ -60,7 +65,7 @@ def test_channel():
     """Test a channel configuration"""
     try:
         user_id = get_jwt_identity()
-        tenant_id = request.tenant_id
+        tenant_id = g.current_tenant.id
         data = request.get_json()
         
         # Validate required fields
@@ -99,7 +104,7 @@ def send_message():
     """Send a message through a specific channel"""
     try:
         user_id = get_jwt_identity()
-        tenant_id = request.tenant_id
+        tenant_id = g.current_tenant.id
         data = request.get_json()
         
         # Validate required fields
@@ -132,10 +137,10 @@ def send_message():
         
         if result['success']:
             return success_response({
-                'message': 'Message sent successfully',
-                'message_id': result.get('message_id'),
+                'message': 'Message queued for delivery',
+                'outbox_id': result['outbox_id'],
                 'channel_type': channel_type
-            })
+            }, status_code=202)
         else:
             return error_response(result['error'], 400)
         
@@ -152,12 +157,22 @@ def receive_webhook(channel_type):
         if not tenant_id:
             return error_response("Tenant ID required", 400)
         
-        tenant_id = int(tenant_id)
         webhook_data = request.get_json()
         
         if not webhook_data:
             return error_response("No webhook data provided", 400)
         
+        # Ack fast and process on a worker, or process inline
+        if current_app.config['WEBHOOK_ASYNC_INGEST']:
+            result = channel_service.accept_webhook(tenant_id, channel_type, webhook_data)
+            if result['success']:
+                return success_response({
+                    'message': 'Webhook accepted',
+                    'webhook_id': result['webhook_id'],
+                    'webhook_ids': result.get('webhook_ids', [])
+                })
+            return error_response(result['error'], 400)
+        
         # Process webhook
         result = channel_service.process_webhook(tenant_id, channel_type, webhook_data)
         
@@ -165,7 +180,8 @@ def receive_webhook(channel_type):
             return success_response({
                 'message': 'Webhook processed successfully',
                 'conversation_id': result.get('conversation_id'),
-                'message_id': result.get('message_id')
+                'message_id': result.get('message_id'),
+                'message_ids': [message['message_id'] for message in result.get('messages', [])]
             })
         else:
             return error_response(result['error'], 400)
@@ -194,14 +210,47 @@ def verify_webhook(channel_type):
     except Exception as e:
         return error_response(f"Webhook verification failed: {str(e)}", 500)
 
+def serialize_conversation_summary(conversation):
+    """Inbox row built from the conversation's denormalized summary columns"""
+    last_message = conversation.last_message_dict()
+    
+    return {
+        'id': conversation.id,
+        'user_id': conversation.channel_user_id,
+        'user_name': (conversation.meta_data or {}).get('user_name'),
+        'user_email': (conversation.meta_data or {}).get('user_email'),
+        'channel_type': conversation.channel_type,
+        'status': conversation.status,
+        'created_at': conversation.created_at.isoformat(),
+        'updated_at': conversation.updated_at.isoformat(),
+        'latest_message': {
+            'content': last_message['content'],
+            'sender_type': last_message['sender_type'],
+            'created_at': conversation.last_message_at.isoformat()
+        } if last_message else None,
+        'message_count': conversation.message_count
+    }
+
+def serialize_message(message):
+    """Message row for the conversation messages endpoint"""
+    return {
+        'id': message.id,
+        'content': message.content,
+        'sender_type': message.sender_type,
+        'platform_message_id': message.platform_message_id,
+        'created_at': message.created_at.isoformat(),
+        'meta_data': message.meta_data
+    }
+
 @channels_bp.route('/conversations', methods=['GET'])
 @jwt_required()
 @tenant_required
+@read_replica
 def get_conversations():
     """Get conversations across all channels"""
     try:
         user_id = get_jwt_identity()
-        tenant_id = request.tenant_id
+        tenant_id = g.current_tenant.id
         
         # Query parameters
         channel_type = request.args.get('channel_type')
@@ -218,6 +267,22 @@ def get_conversations():
         if status:
             query = query.filter_by(status=status)
         
+        if wants_cursor_pagination():
+            result = cursor_paginate_query(
+                query,
+                (Conversation.updated_at, Conversation.id),
+                cursor=request.args.get('cursor'),
+                per_page=per_page,
+                descending=True,
+                include_total=wants_total(),
+                serializer=lambda rows: [serialize_conversation_summary(row) for row in rows]
+            )
+            
+            return success_response({
+                'conversations': result['items'],
+                'pagination': result['pagination']
+            })
+        
         # Paginate
         conversations = query.order_by(Conversation.updated_at.desc()).paginate(
             page=page, 
@@ -225,29 +290,8 @@ def get_conversations():
             error_out=False
         )
         
-        conversations_data = []
-        for conversation in conversations.items:
-            # Get latest message
-            latest_message = Message.query.filter_by(
-                conversation_id=conversation.id
-            ).order_by(Message.created_at.desc()).first()
-            
-            conversations_data.append({
-                'id': conversation.id,
-                'user_id': conversation.user_id,
-                'user_name': conversation.user_name,
-                'user_email': conversation.user_email,
-                'channel_type': conversation.channel_type,
-                'status': conversation.status,
-                'created_at': conversation.created_at.isoformat(),
-                'updated_at': conversation.updated_at.isoformat(),
-                'latest_message': {
-                    'content': latest_message.content if latest_message else None,
-                    'sender_type': latest_message.sender_type if latest_message else None,
-                    'created_at': latest_message.created_at.isoformat() if latest_message else None
-                } if latest_message else None,
-                'message_count': Message.query.filter_by(conversation_id=conversation.id).count()
-            })
+        # Summary columns live on the conversation row, so no per-row queries
+        conversations_data = [serialize_conversation_summary(conversation) for conversation in conversations.items]
         
         return success_response({
             'conversations': conversations_data,
@@ -261,17 +305,19 @@ def get_conversations():
             }
         })
         
+    except ValueError as e:
+        return error_response(str(e), status_code=400)
     except Exception as e:
         return error_response(f"Failed to fetch conversations: {str(e)}", 500)
 
-@channels_bp.route('/conversations/<int:conversation_id>/messages', methods=['GET'])
+@channels_bp.route('/conversations/<conversation_id>/messages', methods=['GET'])
 @jwt_required()
 @tenant_required
 def get_conversation_messages(conversation_id):
     """Get messages for a specific conversation"""
     try:
         user_id = get_jwt_identity()
-        tenant_id = request.tenant_id
+        tenant_id = g.current_tenant.id
         
         # Verify conversation belongs to tenant
         conversation = Conversation.query.filter_by(
@@ -286,34 +332,70 @@ def get_conversation_messages(conversation_id):
         page = int(request.args.get('page', 1))
         per_page = min(int(request.args.get('per_page', 50)), 100)
         
+        conversation_data = {
+            'id': conversation.id,
+            'user_id': conversation.channel_user_id,
+            'user_name': (conversation.meta_data or {}).get('user_name'),
+            'channel_type': conversation.channel_type,
+            'status': conversation.status
+        }
+        
+        if conversation.archived_at:
+            # Older messages live in the compressed archive blob; page over the merged list
+            messages = conversation.get_messages()
+            
+            if wants_cursor_pagination():
+                result = cursor_paginate_items(
+                    messages,
+                    (Message.created_at, Message.id),
+                    cursor=request.args.get('cursor'),
+                    per_page=per_page,
+                    include_total=wants_total(),
+                    serializer=lambda rows: [serialize_message(row) for row in rows]
+                )
+            else:
+                result = paginate_items(
+                    messages,
+                    page=page,
+                    per_page=per_page,
+                    serializer=lambda rows: [serialize_message(row) for row in rows]
+                )
+            
+            return success_response({
+                'conversation': conversation_data,
+                'messages': result['items'],
+                'pagination': result['pagination']
+            })
+        
+        query = Message.query.filter_by(conversation_id=conversation_id)
+        
+        if wants_cursor_pagination():
+            result = cursor_paginate_query(
+                query,
+                (Message.created_at, Message.id),
+                cursor=request.args.get('cursor'),
+                per_page=per_page,
+                include_total=wants_total(),
+                serializer=lambda rows: [serialize_message(row) for row in rows]
+            )
+            
+            return success_response({
+                'conversation': conversation_data,
+                'messages': result['items'],
+                'pagination': result['pagination']
+            })
+        
         # Get messages
-        messages = Message.query.filter_by(
-            conversation_id=conversation_id
-        ).order_by(Message.created_at.asc()).paginate(
+        messages = query.order_by(Message.created_at.asc()).paginate(
             page=page,
             per_page=per_page,
             error_out=False
         )
         
-        messages_data = []
-        for message in messages.items:
-            messages_data.append({
-                'id': message.id,
-                'content': message.content,
-                'sender_type': message.sender_type,
-                'platform_message_id': message.platform_message_id,
-                'created_at': message.created_at.isoformat(),
-                'meta_data': message.meta_data
-            })
+        messages_data = [serialize_message(message) for message in messages.items]
         
         return success_response({
-            'conversation': {
-                'id': conversation.id,
-                'user_id': conversation.user_id,
-                'user_name': conversation.user_name,
-                'channel_type': conversation.channel_type,
-                'status': conversation.status
-            },
+            'conversation': conversation_data,
             'messages': messages_data,
             'pagination': {
                 'page': page,
@@ -325,17 +407,19 @@ def get_conversation_messages(conversation_id):
             }
         })
         
+    except ValueError as e:
+        return error_response(str(e), status_code=400)
     except Exception as e:
         return error_response(f"Failed to fetch messages: {str(e)}", 500)
 
-@channels_bp.route('/conversations/<int:conversation_id>/reply', methods=['POST'])
+@channels_bp.route('/conversations/<conversation_id>/reply', methods=['POST'])
 @jwt_required()
 @tenant_required
 def reply_to_conversation(conversation_id):
     """Reply to a conversation through its original channel"""
     try:
         user_id = get_jwt_identity()
-        tenant_id = request.tenant_id
+        tenant_id = g.current_tenant.id
         data = request.get_json()
         
         if 'message' not in data:
@@ -352,40 +436,36 @@ def reply_to_conversation(conversation_id):
         
         message_content = data['message']
         
-        # Send message through the conversation's channel
-        result = channel_service.send_message(
-            tenant_id,
-            conversation.channel_type,
-            conversation.user_id,
-            message_content
-        )
-        
-        if result['success']:
-            # Save the message
-            message = Message(
-                conversation_id=conversation_id,
-                content=message_content,
-                sender_type='agent',
-                platform_message_id=result.get('message_id'),
+        # Save the message and queue its delivery through the conversation's channel together
+        with unit_of_work():
+            message = conversation.add_message(
+                'agent',
+                message_content,
+                sender_id=user_id,
                 meta_data={
                     'channel_type': conversation.channel_type,
-                    'sent_by_user_id': user_id,
-                    'platform_response': result.get('platform_response', {})
+                    'sent_by_user_id': user_id
                 }
             )
-            message.save()
-            
-            # Update conversation timestamp
-            conversation.updated_at = message.created_at
-            conversation.save()
             
-            return success_response({
-                'message': 'Reply sent successfully',
-                'message_id': message.id,
-                'platform_message_id': result.get('message_id')
-            })
-        else:
-            return error_response(result['error'], 400)
+            result = channel_service.send_message(
+                tenant_id,
+                conversation.channel_type,
+                conversation.channel_user_id,
+                message_content,
+                message_id=message.id
+            )
+            if not result['success']:
+                raise ValueError(result['error'])
+        
+        return success_response({
+            'message': 'Reply queued for delivery',
+            'message_id': message.id,
+            'outbox_id': result['outbox_id']
+        }, status_code=202)
+        
+    except ValueError as e:
+        return error_response(str(e), status_code=400)
         
     except Exception as e:
         return error_response(f"Failed to send reply: {str(e)}", 500)
@@ -393,11 +473,12 @@ def reply_to_conversation(conversation_id):
 @channels_bp.route('/analytics', methods=['GET'])
 @jwt_required()
 @tenant_required
+@read_replica
 def get_channel_analytics():
     """Get analytics data for all channels"""
     try:
         user_id = get_jwt_identity()
-        tenant_id = request.tenant_id
+        tenant_id = g.current_tenant.id
         
         # Query parameters
         days = int(request.args.get('days', 30))
@@ -470,7 +551,7 @@ def get_channel_status():
     """Get status of all configured channels for the tenant"""
     try:
         user_id = get_jwt_identity()
-        tenant_id = request.tenant_id
+        tenant_id = g.current_tenant.id
         
         # Get all registered channels for this tenant
         registered_channels = []
@@ -1,14 +1,16 @@
 from flask import Blueprint, request, g
-from src.models.chatbot import Chatbot, ChatbotChannel, KnowledgeArticle, FAQ
+from src.models.chatbot import Chatbot, ChatbotChannel, KnowledgeArticle, FAQ, load_chatbot_stats
 from src.models import db
 from src.utils.auth import tenant_required, admin_required, validate_json
+from src.utils.replica import read_replica
 from src.utils.responses import success_response, error_response, not_found_response, validation_error_response
-from src.utils.auth import paginate_query
+from src.utils.auth import paginate_query, cursor_paginate_query, wants_cursor_pagination, wants_total
 
 chatbots_bp = Blueprint('chatbots', __name__)
 
 @chatbots_bp.route('', methods=['GET'])
 @tenant_required
+@read_replica
 def list_chatbots():
     """List all chatbots for the current tenant"""
     page = request.args.get('page', 1, type=int)
@@ -16,12 +18,25 @@ def list_chatbots():
     
     query = Chatbot.query.filter_by(tenant_id=g.current_tenant.id)
     
-    result = paginate_query(query, page, per_page)
-    
-    # Add stats to each chatbot
-    for chatbot_data in result['items']:
-        chatbot = Chatbot.query.get(chatbot_data['id'])
-        chatbot_data.update(chatbot.to_dict(include_stats=True))
+    def serialize_with_stats(chatbots):
+        # Stats for the whole page come from a fixed number of grouped queries
+        stats = load_chatbot_stats(chatbot.id for chatbot in chatbots)
+        return [chatbot.to_dict(include_stats=True, stats=stats[chatbot.id]) for chatbot in chatbots]
+    
+    if wants_cursor_pagination():
+        try:
+            result = cursor_paginate_query(
+                query,
+                (Chatbot.created_at, Chatbot.id),
+                cursor=request.args.get('cursor'),
+                per_page=per_page,
+                include_total=wants_total(),
+                serializer=serialize_with_stats
+            )
+        except ValueError as e:
+            return error_response(str(e), status_code=400)
+    else:
+        result = paginate_query(query, page, per_page, serializer=serialize_with_stats)
     
     return success_response(result)
 
@@ -181,7 +196,7 @@ def list_chatbot_channels(chatbot_id):
         tenant_id=g.current_tenant.id
     ).all()
     
-    return success_response([channel.to_dict() for channel in channels])
+    return success_response(ChatbotChannel.serialize_many(channels))
 
 @chatbots_bp.route('/<chatbot_id>/channels', methods=['POST'])
 @admin_required
@@ -0,0 +1,154 @@
+"""
+Archive Service
+Moves messages of old resolved conversations out of the hot messages table
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+from flask import current_app
+from sqlalchemy import and_, delete, insert, or_, select, update
+from src.models import db, unit_of_work
+from src.models.conversation import Conversation, Message, MessageArchive
+from src.models.tenant import Tenant
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ArchiveService:
+    """Service for compressing resolved conversations into message_archives"""
+    
+    def __init__(self):
+        self.conversations = Conversation.__table__
+        self.messages = Message.__table__
+        self.archives = MessageArchive.__table__
+    
+    def archive_after_days(self, settings: Optional[dict]) -> int:
+        """Archive threshold for a tenant; 0 means never archive"""
+        days = (settings or {}).get('archive_after_days')
+        if days is None:
+            days = current_app.config['ARCHIVE_AFTER_DAYS']
+        return int(days)
+    
+    def archive_conversations(self, tenant_id: Optional[str] = None, batch_size: int = 200,
+                              now: Optional[datetime] = None,
+                              progress: Optional[Callable[[int], None]] = None) -> int:
+        """
+        Archive every eligible conversation, batch by batch
+        
+        A conversation is eligible once it is resolved and has been quiet for
+        longer than its tenant's threshold. Conversations that received new
+        messages after being archived are archived again, merging the blobs.
+        
+        Returns:
+            Number of conversations archived
+        """
+        now = now or datetime.utcnow()
+        conversations = self.conversations.c
+        
+        tenants = db.session.query(Tenant.id, Tenant.settings)
+        if tenant_id:
+            tenants = tenants.filter(Tenant.id == tenant_id)
+        
+        total = 0
+        for current_tenant_id, settings in tenants.all():
+            days = self.archive_after_days(settings)
+            if days <= 0:
+                continue
+            cutoff = now - timedelta(days=days)
+            
+            while True:
+                conversation_ids = db.session.execute(
+                    select(conversations.id)
+                    .where(
+                        conversations.tenant_id == current_tenant_id,
+                        conversations.status == 'resolved',
+                        conversations.updated_at < cutoff,
+                        or_(
+                            conversations.archived_at.is_(None),
+                            and_(
+                                conversations.last_message_at > conversations.archived_at,
+                                conversations.last_message_at <= now
+                            )
+                        )
+                    )
+                    .limit(batch_size)
+                ).scalars().all()
+                
+                if not conversation_ids:
+                    break
+                
+                self._archive_batch(current_tenant_id, conversation_ids, now)
+                total += len(conversation_ids)
+                if progress:
+                    progress(total)
+        
+        return total
+    
+    def _archive_batch(self, tenant_id: str, conversation_ids: List[str], now: datetime):
+        """Move the hot messages of a batch of conversations into their archive blobs"""
+        messages = self.messages.c
+        archives = self.archives.c
+        
+        with unit_of_work():
+            grouped = defaultdict(list)
+            for row in db.session.execute(
+                select(self.messages)
+                .where(messages.conversation_id.in_(conversation_ids))
+                .order_by(messages.conversation_id, messages.created_at, messages.id)
+            ).mappings():
+                grouped[row['conversation_id']].append(row)
+            
+            existing = {
+                row.conversation_id: row.payload
+                for row in db.session.execute(
+                    select(archives.conversation_id, archives.payload)
+                    .where(archives.conversation_id.in_(conversation_ids))
+                )
+            }
+            
+            new_archives = []
+            for conversation_id in conversation_ids:
+                rows = grouped.get(conversation_id, [])
+                if conversation_id in existing:
+                    if not rows:
+                        continue
+                    rows = MessageArchive.unpack(existing[conversation_id]) + rows
+                    db.session.execute(
+                        update(self.archives)
+                        .where(archives.conversation_id == conversation_id)
+                        .values(payload=MessageArchive.pack(rows), message_count=len(rows), archived_at=now)
+                    )
+                else:
+                    new_archives.append({
+                        'conversation_id': conversation_id,
+                        'tenant_id': tenant_id,
+                        'message_count': len(rows),
+                        'payload': MessageArchive.pack(rows),
+                        'archived_at': now
+                    })
+            
+            if new_archives:
+                db.session.execute(insert(self.archives), new_archives)
+            
+            # Delete exactly the rows that were archived, never later arrivals
+            message_ids = [row['id'] for rows in grouped.values() for row in rows]
+            for offset in range(0, len(message_ids), 500):
+                db.session.execute(
+                    delete(self.messages).where(messages.id.in_(message_ids[offset:offset + 500]))
+                )
+            
+            db.session.execute(
+                update(self.conversations)
+                .where(self.conversations.c.id.in_(conversation_ids))
+                .values(
+                    archived_at=now,
+                    # Archiving is not activity; keep the inbox ordering untouched
+                    updated_at=self.conversations.c.updated_at
+                )
+            )
+        
+        logger.info(f"Archived {len(message_ids)} messages from {len(conversation_ids)} conversations")
+
+# Global archive service instance
+archive_service = ArchiveService()
@@ -3,14 +3,25 @@ Multi-Channel Communication Service
 Handles messaging across different platforms (Telegram, WhatsApp, Messenger, etc.)
 """
 
-import requests
 import json
 from abc import ABC, abstractmethod
 from typing import Dict, List, Any, Optional
 from datetime import datetime
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from src.config import Config
+from src.models import db, unit_of_work
 from src.models.conversation import Conversation, Message
-from src.models.chatbot import Chatbot
+from src.models.chatbot import Chatbot, ChatbotChannel
 from src.services.automation_service import automation_service
+from src.services.http_client import http_client
+from src.services.inbox_service import inbox_service
+from src.services.ingest_service import ingest_service
+from src.services.outbox_service import outbox_service
+from src.services.profile_service import profile_service
+from src.utils.cache import TTLCache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -37,6 +48,16 @@ class ChannelAdapter(ABC):
         """Process incoming message from webhook"""
         pass
     
+    def receive_messages(self, webhook_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Every message in a webhook, each shaped like a receive_message result
+        
+        Platforms that batch several events into one webhook override this.
+        """
+        message_result = self.receive_message(webhook_data)
+        if not message_result['success']:
+            return message_result
+        return {'success': True, 'messages': [message_result]}
+    
     @abstractmethod
     def validate_webhook(self, webhook_data: Dict[str, Any]) -> bool:
         """Validate incoming webhook data"""
@@ -72,7 +93,7 @@ class TelegramAdapter(ChannelAdapter):
             if 'reply_markup' in kwargs:
                 payload['reply_markup'] = kwargs['reply_markup']
             
-            response = requests.post(url, json=payload, timeout=30)
+            response = http_client.post(url, json=payload, timeout=30)
             
             if response.status_code == 200:
                 return {
@@ -84,6 +105,7 @@ class TelegramAdapter(ChannelAdapter):
                 return {
                     'success': False,
                     'error': f'Telegram API error: {response.status_code}',
+                    'status_code': response.status_code,
                     'response': response.text
                 }
                 
@@ -105,7 +127,8 @@ class TelegramAdapter(ChannelAdapter):
                 'user_name': message_data['from'].get('first_name', '') + ' ' + message_data['from'].get('last_name', ''),
                 'user_username': message_data['from'].get('username'),
                 'message_text': message_data.get('text', ''),
-                'message_id': str(message_data['message_id']),
+                # message_id is only unique within a chat
+                'message_id': f"{message_data['chat']['id']}:{message_data['message_id']}",
                 'chat_id': str(message_data['chat']['id']),
                 'timestamp': datetime.fromtimestamp(message_data['date']),
                 'platform_data': message_data
@@ -142,7 +165,7 @@ class TelegramAdapter(ChannelAdapter):
             
             url = f"https://api.telegram.org/bot{bot_token}/getChat"
             
-            response = requests.get(url, params={'chat_id': user_id}, timeout=10)
+            response = http_client.get(url, params={'chat_id': user_id}, timeout=10)
             
             if response.status_code == 200:
                 user_data = response.json()['result']
@@ -155,7 +178,7 @@ class TelegramAdapter(ChannelAdapter):
                     'type': user_data.get('type', 'private')
                 }
             else:
-                return {'success': False, 'error': f'Telegram API error: {response.status_code}'}
+                return {'success': False, 'error': f'Telegram API error: {response.status_code}', 'status_code': response.status_code}
                 
         except Exception as e:
             logger.error(f"Telegram get user info failed: {str(e)}")
@@ -196,7 +219,7 @@ class WhatsAppAdapter(ChannelAdapter):
                 payload['template'] = kwargs['template']
                 del payload['text']
             
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = http_client.post(url, json=payload, headers=headers, timeout=30)
             
             if response.status_code == 200:
                 return {
@@ -208,6 +231,7 @@ class WhatsAppAdapter(ChannelAdapter):
                 return {
                     'success': False,
                     'error': f'WhatsApp API error: {response.status_code}',
+                    'status_code': response.status_code,
                     'response': response.text
                 }
                 
@@ -216,31 +240,44 @@ class WhatsAppAdapter(ChannelAdapter):
             return {'success': False, 'error': str(e)}
     
     def receive_message(self, webhook_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process incoming WhatsApp message"""
+        """Process incoming WhatsApp message (the first one of the webhook)"""
+        result = self.receive_messages(webhook_data)
+        if not result['success']:
+            return result
+        return result['messages'][0]
+    
+    def receive_messages(self, webhook_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Process every message in a WhatsApp webhook (entry[] x changes[] x messages[])"""
         try:
             if 'entry' not in webhook_data:
                 return {'success': False, 'error': 'No entry in webhook data'}
             
-            entry = webhook_data['entry'][0]
-            changes = entry['changes'][0]
-            value = changes['value']
-            
-            if 'messages' not in value:
+            messages = []
+            for entry in webhook_data['entry']:
+                for change in entry.get('changes', []):
+                    value = change.get('value', {})
+                    names = {
+                        contact.get('wa_id'): contact.get('profile', {}).get('name', '')
+                        for contact in value.get('contacts', [])
+                    }
+                    
+                    # Status updates (sent/delivered/read) carry no messages
+                    for message_data in value.get('messages', []):
+                        messages.append({
+                            'success': True,
+                            'user_id': message_data['from'],
+                            'user_name': names.get(message_data['from'], ''),
+                            'user_phone': message_data['from'],
+                            'message_text': message_data.get('text', {}).get('body', ''),
+                            'message_id': message_data['id'],
+                            'timestamp': datetime.fromtimestamp(int(message_data['timestamp'])),
+                            'platform_data': message_data
+                        })
+            
+            if not messages:
                 return {'success': False, 'error': 'No messages in webhook data'}
             
-            message_data = value['messages'][0]
-            contact_data = value['contacts'][0]
-            
-            return {
-                'success': True,
-                'user_id': message_data['from'],
-                'user_name': contact_data['profile']['name'],
-                'user_phone': message_data['from'],
-                'message_text': message_data.get('text', {}).get('body', ''),
-                'message_id': message_data['id'],
-                'timestamp': datetime.fromtimestamp(int(message_data['timestamp'])),
-                'platform_data': message_data
-            }
+            return {'success': True, 'messages': messages}
             
         except Exception as e:
             logger.error(f"WhatsApp receive message failed: {str(e)}")
@@ -307,7 +344,7 @@ class MessengerAdapter(ChannelAdapter):
             if 'quick_replies' in kwargs:
                 payload['message']['quick_replies'] = kwargs['quick_replies']
             
-            response = requests.post(url, json=payload, params=params, timeout=30)
+            response = http_client.post(url, json=payload, params=params, timeout=30)
             
             if response.status_code == 200:
                 return {
@@ -319,6 +356,7 @@ class MessengerAdapter(ChannelAdapter):
                 return {
                     'success': False,
                     'error': f'Messenger API error: {response.status_code}',
+                    'status_code': response.status_code,
                     'response': response.text
                 }
                 
@@ -327,28 +365,39 @@ class MessengerAdapter(ChannelAdapter):
             return {'success': False, 'error': str(e)}
     
     def receive_message(self, webhook_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process incoming Messenger message"""
+        """Process incoming Messenger message (the first one of the webhook)"""
+        result = self.receive_messages(webhook_data)
+        if not result['success']:
+            return result
+        return result['messages'][0]
+    
+    def receive_messages(self, webhook_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Process every message in a Messenger webhook (entry[] x messaging[])"""
         try:
             if 'entry' not in webhook_data:
                 return {'success': False, 'error': 'No entry in webhook data'}
             
-            entry = webhook_data['entry'][0]
-            messaging = entry['messaging'][0]
-            
-            if 'message' not in messaging:
+            messages = []
+            for entry in webhook_data['entry']:
+                # Deliveries, reads and postbacks carry no message
+                for messaging in entry.get('messaging', []):
+                    if 'message' not in messaging:
+                        continue
+                    
+                    message_data = messaging['message']
+                    messages.append({
+                        'success': True,
+                        'user_id': messaging['sender']['id'],
+                        'message_text': message_data.get('text', ''),
+                        'message_id': message_data['mid'],
+                        'timestamp': datetime.fromtimestamp(messaging['timestamp'] / 1000),
+                        'platform_data': messaging
+                    })
+            
+            if not messages:
                 return {'success': False, 'error': 'No message in webhook data'}
             
-            message_data = messaging['message']
-            sender = messaging['sender']
-            
-            return {
-                'success': True,
-                'user_id': sender['id'],
-                'message_text': message_data.get('text', ''),
-                'message_id': message_data['mid'],
-                'timestamp': datetime.fromtimestamp(messaging['timestamp'] / 1000),
-                'platform_data': messaging
-            }
+            return {'success': True, 'messages': messages}
             
         except Exception as e:
             logger.error(f"Messenger receive message failed: {str(e)}")
@@ -381,7 +430,7 @@ class MessengerAdapter(ChannelAdapter):
                 'fields': 'first_name,last_name,profile_pic'
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = http_client.get(url, params=params, timeout=10)
             
             if response.status_code == 200:
                 user_data = response.json()
@@ -394,7 +443,7 @@ class MessengerAdapter(ChannelAdapter):
                     'platform': 'messenger'
                 }
             else:
-                return {'success': False, 'error': f'Messenger API error: {response.status_code}'}
+                return {'success': False, 'error': f'Messenger API error: {response.status_code}', 'status_code': response.status_code}
                 
         except Exception as e:
             logger.error(f"Messenger get user info failed: {str(e)}")
@@ -426,7 +475,7 @@ class DiscordAdapter(ChannelAdapter):
             if 'embeds' in kwargs:
                 payload['embeds'] = kwargs['embeds']
             
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = http_client.post(url, json=payload, headers=headers, timeout=30)
             
             if response.status_code == 200:
                 return {
@@ -438,6 +487,7 @@ class DiscordAdapter(ChannelAdapter):
                 return {
                     'success': False,
                     'error': f'Discord API error: {response.status_code}',
+                    'status_code': response.status_code,
                     'response': response.text
                 }
                 
@@ -490,7 +540,7 @@ class DiscordAdapter(ChannelAdapter):
             
             headers = {'Authorization': f'Bot {bot_token}'}
             
-            response = requests.get(url, headers=headers, timeout=10)
+            response = http_client.get(url, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 user_data = response.json()
@@ -503,17 +553,24 @@ class DiscordAdapter(ChannelAdapter):
                     'platform': 'discord'
                 }
             else:
-                return {'success': False, 'error': f'Discord API error: {response.status_code}'}
+                return {'success': False, 'error': f'Discord API error: {response.status_code}', 'status_code': response.status_code}
                 
         except Exception as e:
             logger.error(f"Discord get user info failed: {str(e)}")
             return {'success': False, 'error': str(e)}
 
+# Cached marker for tenants without an active channel of a type
+NOT_CONFIGURED = object()
+
 class ChannelService:
     """Main service for managing multi-channel communications"""
     
     def __init__(self):
-        self.adapters = {}
+        # (tenant_id, channel_type) -> adapter built from the ChatbotChannel row,
+        # or NOT_CONFIGURED; bounded so memory tracks the tenants this worker serves
+        self.adapters = TTLCache(maxsize=Config.ADAPTER_CACHE_SIZE)
+        # Recently stored inbound platform message IDs; redeliveries stop here
+        self.recent_message_ids = TTLCache(maxsize=Config.INBOUND_DEDUP_CACHE_SIZE)
         self.register_default_adapters()
     
     def register_default_adapters(self):
@@ -525,8 +582,13 @@ class ChannelService:
             'discord': DiscordAdapter
         }
     
-    def register_channel(self, tenant_id: int, channel_type: str, config: Dict[str, Any]) -> Dict[str, Any]:
-        """Register a new channel for a tenant"""
+    def register_channel(self, tenant_id: int, channel_type: str, config: Dict[str, Any],
+                         chatbot_id: Optional[str] = None) -> Dict[str, Any]:
+        """Register a new channel for a tenant
+        
+        Saves the config on the tenant's ChatbotChannel row for this channel
+        type (created on chatbot_id, or the only chatbot, if there is none).
+        """
         try:
             if channel_type not in self.adapter_classes:
                 return {'success': False, 'error': f'Unsupported channel type: {channel_type}'}
@@ -539,9 +601,25 @@ class ChannelService:
             if not test_result['success']:
                 return {'success': False, 'error': f'Channel configuration test failed: {test_result["error"]}'}
             
-            # Store adapter for tenant
-            key = f"{tenant_id}:{channel_type}"
-            self.adapters[key] = adapter
+            # Store the config; every worker loads the adapter from this row
+            query = ChatbotChannel.query.filter_by(tenant_id=tenant_id, channel_type=channel_type)
+            if chatbot_id:
+                query = query.filter_by(chatbot_id=chatbot_id)
+            channel = query.order_by(ChatbotChannel.created_at).first()
+            
+            if channel is None:
+                chatbots = Chatbot.query.filter_by(tenant_id=tenant_id)
+                if chatbot_id:
+                    chatbots = chatbots.filter_by(id=chatbot_id)
+                chatbot_ids = [chatbot.id for chatbot in chatbots.limit(2)]
+                if len(chatbot_ids) != 1:
+                    return {'success': False, 'error': 'chatbot_id is required' if chatbot_ids else 'Chatbot not found'}
+                
+                channel = ChatbotChannel(tenant_id=tenant_id, chatbot_id=chatbot_ids[0], channel_type=channel_type)
+            
+            channel.channel_config = config
+            channel.is_active = True
+            channel.save()
             
             return {
                 'success': True,
@@ -554,8 +632,35 @@ class ChannelService:
             return {'success': False, 'error': str(e)}
     
     def send_message(self, tenant_id: int, channel_type: str, recipient_id: str, 
-                    message: str, **kwargs) -> Dict[str, Any]:
-        """Send message through specified channel"""
+                    message: str, message_id: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Queue a message for the outbox workers; commits with the caller's transaction
+        
+        message_id links the send to a stored Message, which gets the
+        platform message id once delivered.
+        """
+        try:
+            adapter = self.get_adapter(tenant_id, channel_type)
+            if not adapter:
+                return {'success': False, 'error': f'Channel {channel_type} not configured for tenant'}
+            
+            outbox_id = outbox_service.enqueue(
+                tenant_id,
+                channel_type,
+                recipient_id,
+                message,
+                message_id=message_id,
+                options=kwargs
+            )
+            
+            return {'success': True, 'queued': True, 'outbox_id': outbox_id}
+            
+        except Exception as e:
+            logger.error(f"Queue message failed: {str(e)}")
+            return {'success': False, 'error': str(e)}
+    
+    def deliver_message(self, tenant_id: int, channel_type: str, recipient_id: str, 
+                        message: str, **kwargs) -> Dict[str, Any]:
+        """Send message through specified channel now (called by the outbox workers)"""
         try:
             adapter = self.get_adapter(tenant_id, channel_type)
             if not adapter:
@@ -573,8 +678,14 @@ class ChannelService:
             logger.error(f"Send message failed: {str(e)}")
             return {'success': False, 'error': str(e)}
     
-    def process_webhook(self, tenant_id: int, channel_type: str, webhook_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Process incoming webhook from channel"""
+    def process_webhook(self, tenant_id: int, channel_type: str, webhook_data: Dict[str, Any],
+                        sender_id: Optional[str] = None) -> Dict[str, Any]:
+        """Process incoming webhook from channel
+        
+        Every message in the webhook (or only sender_id's, for inbox rows) is
+        ingested in one transaction, with one active-conversation lookup for
+        all of its senders.
+        """
         try:
             adapter = self.get_adapter(tenant_id, channel_type)
             if not adapter:
@@ -584,83 +695,227 @@ class ChannelService:
             if not adapter.validate_webhook(webhook_data):
                 return {'success': False, 'error': 'Invalid webhook data'}
             
-            # Process message
-            message_result = adapter.receive_message(webhook_data)
-            if not message_result['success']:
-                return message_result
-            
-            # Create or find conversation
-            conversation = self.get_or_create_conversation(
-                tenant_id, 
-                channel_type, 
-                message_result['user_id'],
-                message_result
-            )
+            # Process messages
+            messages_result = adapter.receive_messages(webhook_data)
+            if not messages_result['success']:
+                return messages_result
+            
+            events = messages_result['messages']
+            if sender_id is not None:
+                events = [event for event in events if event['user_id'] == sender_id]
+            
+            # Platform redeliveries of messages this process already stored
+            events = self.new_inbound_events(tenant_id, channel_type, events)
+            if not events:
+                return {'success': True, 'duplicate': True}
+            
+            try:
+                results = self.ingest_events(tenant_id, channel_type, events)
+            except IntegrityError:
+                # A concurrent or cross-process redelivery stored some of them first;
+                # retry once with only the messages that are still missing
+                db.session.rollback()
+                stored = ingest_service.find_inbound_platform_ids(
+                    tenant_id, channel_type, [event['message_id'] for event in events]
+                )
+                ttl = current_app.config['INBOUND_DEDUP_TTL']
+                for platform_message_id in stored:
+                    self.recent_message_ids.set((tenant_id, channel_type, platform_message_id), True, ttl=ttl)
+                
+                events = [event for event in events if event['message_id'] not in stored]
+                if not events:
+                    return {'success': True, 'duplicate': True}
+                results = self.ingest_events(tenant_id, channel_type, events)
             
-            # Save message
-            message = Message(
-                conversation_id=conversation.id,
-                content=message_result['message_text'],
-                sender_type='user',
-                platform_message_id=message_result['message_id'],
-                meta_data={
-                    'channel_type': channel_type,
-                    'platform_data': message_result.get('platform_data', {})
-                }
-            )
-            message.save()
+            return {
+                'success': True,
+                'conversation_id': results[0]['conversation_id'],
+                'message_id': results[0]['message_id'],
+                'bot_response': results[0]['bot_response'],
+                'messages': results
+            }
             
-            # Trigger automation
-            automation_service.trigger_automation(
-                'message_received',
+        except Exception as e:
+            logger.error(f"Webhook processing failed: {str(e)}")
+            # Validation failures above are final; this may be a transient DB/network error
+            return {'success': False, 'error': str(e), 'retryable': True}
+    
+    def new_inbound_events(self, tenant_id: int, channel_type: str, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Events minus recently stored ones and repeats within the same webhook"""
+        seen = set()
+        new_events = []
+        for event in events:
+            key = (tenant_id, channel_type, event['message_id'])
+            if key in seen or self.recent_message_ids.get(key):
+                continue
+            seen.add(key)
+            new_events.append(event)
+        return new_events
+    
+    def ingest_events(self, tenant_id: int, channel_type: str, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Store messages, run automations and queue bot replies in one transaction"""
+        results = []
+        
+        # Conversation, messages and automation rows commit together
+        with unit_of_work():
+            # Find the active conversations without loading them; create one on first contact
+            conversation_ids = ingest_service.find_active_conversation_ids(
                 tenant_id,
-                {
-                    'conversation': conversation.to_dict(),
-                    'message': message.to_dict(),
-                    'channel_type': channel_type
-                }
+                channel_type,
+                {event['user_id'] for event in events}
             )
             
-            # Generate bot response (this would integrate with your AI service)
-            bot_response = self.generate_bot_response(conversation, message)
-            if bot_response:
-                # Send response back through the same channel
-                send_result = self.send_message(
+            for event in events:
+                conversation_id = conversation_ids.get(event['user_id'])
+                if conversation_id is None:
+                    conversation_id = conversation_ids[event['user_id']] = self.get_or_create_conversation(
+                        tenant_id, 
+                        channel_type, 
+                        event['user_id'],
+                        event
+                    ).id
+                
+                # Insert the message and update the conversation summary in Core
+                message, conversation = ingest_service.ingest_message(
                     tenant_id,
-                    channel_type,
-                    message_result['user_id'],
-                    bot_response
+                    conversation_id,
+                    'user',
+                    event['message_text'],
+                    sender_id=event['user_id'],
+                    platform_message_id=event['message_id'],
+                    meta_data={
+                        'channel_type': channel_type,
+                        'platform_data': event.get('platform_data', {})
+                    },
+                    channel_type=channel_type
+                )
+                db.session.info.setdefault('inbound_message_keys', set()).add(
+                    (tenant_id, channel_type, event['message_id'])
                 )
                 
-                if send_result['success']:
-                    # Save bot response
-                    bot_message = Message(
-                        conversation_id=conversation.id,
-                        content=bot_response,
-                        sender_type='bot',
-                        platform_message_id=send_result.get('message_id'),
-                        meta_data={
-                            'channel_type': channel_type,
-                            'platform_response': send_result.get('platform_response', {})
-                        }
+                # Trigger automation
+                automation_service.trigger_automation(
+                    'message_received',
+                    tenant_id,
+                    {
+                        'conversation': Conversation.row_to_dict(conversation),
+                        'message': Message.row_to_dict(message),
+                        'channel_type': channel_type
+                    }
+                )
+                
+                # Generate bot response (this would integrate with your AI service)
+                bot_response = self.generate_bot_response(conversation, message)
+                if bot_response:
+                    # Save the bot response and queue its delivery in the same transaction
+                    bot_message, _ = ingest_service.ingest_message(
+                        tenant_id,
+                        conversation_id,
+                        'bot',
+                        bot_response,
+                        meta_data={'channel_type': channel_type},
+                        channel_type=channel_type
                     )
-                    bot_message.save()
+                    self.send_message(
+                        tenant_id,
+                        channel_type,
+                        event['user_id'],
+                        bot_response,
+                        message_id=bot_message.id
+                    )
+                
+                results.append({
+                    'conversation_id': conversation_id,
+                    'message_id': message.id,
+                    'bot_response': bot_response
+                })
+        
+        return results
+    
+    def accept_webhook(self, tenant_id: int, channel_type: str, webhook_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate a webhook and store it for the inbox workers (WEBHOOK_ASYNC_INGEST)
+        
+        Only in-memory checks run here, so the platform gets its ack quickly;
+        process_webhook runs later on a worker.
+        """
+        try:
+            adapter = self.get_adapter(tenant_id, channel_type)
+            if not adapter:
+                return {'success': False, 'error': f'Channel {channel_type} not configured for tenant'}
             
-            return {
-                'success': True,
-                'conversation_id': conversation.id,
-                'message_id': message.id,
-                'bot_response': bot_response
-            }
+            if not adapter.validate_webhook(webhook_data):
+                return {'success': False, 'error': 'Invalid webhook data'}
+            
+            messages_result = adapter.receive_messages(webhook_data)
+            if not messages_result['success']:
+                return messages_result
+            
+            # Known redeliveries are acknowledged without queueing
+            events = self.new_inbound_events(tenant_id, channel_type, messages_result['messages'])
+            if not events:
+                return {'success': True, 'duplicate': True, 'webhook_id': None}
+            
+            # One row per sender, so each is ordered behind that sender's earlier webhooks
+            sender_ids = list(dict.fromkeys(event['user_id'] for event in events))
+            webhook_ids = [
+                inbox_service.enqueue(tenant_id, channel_type, webhook_data, sender_id=sender_id)
+                for sender_id in sender_ids
+            ]
+            
+            return {'success': True, 'queued': True, 'webhook_id': webhook_ids[0], 'webhook_ids': webhook_ids}
             
         except Exception as e:
-            logger.error(f"Webhook processing failed: {str(e)}")
+            logger.error(f"Webhook accept failed: {str(e)}")
             return {'success': False, 'error': str(e)}
     
     def get_adapter(self, tenant_id: int, channel_type: str) -> Optional[ChannelAdapter]:
-        """Get channel adapter for tenant"""
-        key = f"{tenant_id}:{channel_type}"
-        return self.adapters.get(key)
+        """Get channel adapter for tenant, loading it from ChatbotChannel on a cache miss"""
+        key = (tenant_id, channel_type)
+        adapter = self.adapters.get(key)
+        if adapter is None:
+            adapter = self.load_adapter(tenant_id, channel_type)
+            ttl = current_app.config['ADAPTER_CACHE_TTL']
+            if adapter is NOT_CONFIGURED:
+                ttl = min(ttl, current_app.config['ADAPTER_NEGATIVE_CACHE_TTL'])
+            self.adapters.set(key, adapter, ttl=ttl)
+        
+        return None if adapter is NOT_CONFIGURED else adapter
+    
+    def active_channel(self, tenant_id: int, channel_type: str):
+        """(channel_config, chatbot_id) of the tenant's oldest active channel of this type, or None
+        
+        Webhooks are answered by the adapter built from this row, so the
+        conversations they open belong to the same row's chatbot.
+        """
+        return db.session.execute(
+            select(ChatbotChannel.channel_config, ChatbotChannel.chatbot_id)
+            .where(
+                ChatbotChannel.tenant_id == tenant_id,
+                ChatbotChannel.channel_type == channel_type,
+                ChatbotChannel.is_active.is_(True)
+            )
+            .order_by(ChatbotChannel.created_at)
+            .limit(1)
+        ).first()
+    
+    def load_adapter(self, tenant_id: int, channel_type: str):
+        """Adapter for the tenant's oldest active channel of this type, or NOT_CONFIGURED"""
+        adapter_class = self.adapter_classes.get(channel_type)
+        if adapter_class is None:
+            return NOT_CONFIGURED
+        
+        channel = self.active_channel(tenant_id, channel_type)
+        if channel is None:
+            return NOT_CONFIGURED
+        
+        return adapter_class(channel.channel_config or {})
+    
+    def invalidate_adapter(self, tenant_id: int, channel_type: str):
+        self.adapters.delete((tenant_id, channel_type))
+    
+    def get_user_info(self, tenant_id: int, channel_type: str, user_id: str) -> Dict[str, Any]:
+        """Platform profile of a channel user, cached (see ProfileService)"""
+        return profile_service.get_profile(tenant_id, channel_type, user_id)
     
     def get_or_create_conversation(self, tenant_id: int, channel_type: str, 
                                  user_id: str, message_data: Dict[str, Any]) -> Conversation:
@@ -669,7 +924,7 @@ class ChannelService:
             # Look for existing conversation
             conversation = Conversation.query.filter_by(
                 tenant_id=tenant_id,
-                user_id=user_id,
+                channel_user_id=user_id,
                 channel_type=channel_type,
                 status='active'
             ).first()
@@ -677,15 +932,21 @@ class ChannelService:
             if conversation:
                 return conversation
             
+            # Conversations belong to the chatbot of the channel that answers them
+            channel = self.active_channel(tenant_id, channel_type)
+            if channel is None:
+                raise ValueError(f'No active chatbot channel configured for {channel_type}')
+            
             # Create new conversation
             conversation = Conversation(
                 tenant_id=tenant_id,
-                user_id=user_id,
+                chatbot_id=channel.chatbot_id,
+                channel_user_id=user_id,
                 channel_type=channel_type,
-                user_name=message_data.get('user_name', ''),
-                user_email=message_data.get('user_email', ''),
                 status='active',
                 meta_data={
+                    'user_name': message_data.get('user_name', ''),
+                    'user_email': message_data.get('user_email', ''),
                     'platform_user_data': message_data.get('platform_data', {}),
                     'first_message_time': datetime.utcnow().isoformat()
                 }
@@ -708,8 +969,11 @@ class ChannelService:
             logger.error(f"Get or create conversation failed: {str(e)}")
             raise
     
-    def generate_bot_response(self, conversation: Conversation, message: Message) -> Optional[str]:
-        """Generate bot response (placeholder for AI integration)"""
+    def generate_bot_response(self, conversation: Any, message: Any) -> Optional[str]:
+        """Generate bot response (placeholder for AI integration)
+        
+        Accepts ORM instances or Core rows; only column attributes are read.
+        """
         try:
             # This would integrate with your AI service (OpenAI, etc.)
             # For now, return a simple response
@@ -814,3 +1078,32 @@ class ChannelService:
 # Global channel service instance
 channel_service = ChannelService()
 
+# Drop cached adapters whose channel rows changed, once the transaction ends.
+# Other processes pick the change up when their entry expires (ADAPTER_CACHE_TTL).
+
+@event.listens_for(Session, 'after_flush')
+def _collect_channel_changes(session, flush_context):
+    channels = session.info.setdefault('adapter_invalidations', set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, ChatbotChannel):
+            channels.add((obj.tenant_id, obj.channel_type))
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _apply_channel_changes(session):
+    for tenant_id, channel_type in session.info.pop('adapter_invalidations', set()):
+        channel_service.invalidate_adapter(tenant_id, channel_type)
+
+# Remember inbound message IDs once their transaction commits
+
+@event.listens_for(Session, 'after_commit')
+def _remember_inbound_messages(session):
+    keys = session.info.pop('inbound_message_keys', ())
+    if keys:
+        ttl = current_app.config['INBOUND_DEDUP_TTL']
+        for key in keys:
+            channel_service.recent_message_ids.set(key, True, ttl=ttl)
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_inbound_messages(session):
+    session.info.pop('inbound_message_keys', None)
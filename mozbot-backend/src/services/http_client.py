@@ -0,0 +1,96 @@
+"""
+HTTP Client Service
+Shared keep-alive sessions for outbound platform API calls, one connection
+pool per host, with default timeouts and connection retries
+"""
+
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import logging
+import os
+import requests
+import threading
+
+logger = logging.getLogger(__name__)
+
+class HttpClient:
+    """Pooled requests sessions keyed by scheme and host"""
+    
+    def __init__(self):
+        self._sessions: Dict[Tuple[str, str], requests.Session] = {}
+        self._sessions_pid = None
+        self._lock = threading.Lock()
+    
+    def _build_session(self) -> requests.Session:
+        config = current_app.config
+        retries = config['HTTP_RETRIES']
+        
+        # Connection failures are retried for every method (the request never
+        # left); read errors and 429/5xx only for idempotent methods, so a
+        # send is never duplicated by a retry
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=config['HTTP_RETRY_BACKOFF'],
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config['HTTP_POOL_MAXSIZE'], max_retries=retry)
+        
+        session = requests.Session()
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+    
+    def session(self, url: str) -> requests.Session:
+        """Session for the url's host (recreated after fork, sockets are not shared)"""
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        
+        with self._lock:
+            if self._sessions_pid != os.getpid():
+                self._sessions = {}
+                self._sessions_pid = os.getpid()
+            
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = self._build_session()
+            return session
+    
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """requests.request through the host pool
+        
+        timeout may be a number (read timeout, connect timeout from config),
+        a (connect, read) tuple, or omitted for the configured defaults.
+        """
+        config = current_app.config
+        timeout = kwargs.pop('timeout', None)
+        if timeout is None:
+            timeout = (config['HTTP_CONNECT_TIMEOUT'], config['HTTP_READ_TIMEOUT'])
+        elif not isinstance(timeout, tuple):
+            timeout = (config['HTTP_CONNECT_TIMEOUT'], timeout)
+        
+        return self.session(url).request(method, url, timeout=timeout, **kwargs)
+    
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+    
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+    
+    def close(self):
+        """Close every pooled connection"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+# Global HTTP client instance
+http_client = HttpClient()
@@ -0,0 +1,128 @@
+"""
+Inbox Service
+Durable queue of acknowledged webhooks. The endpoint only stores the raw
+payload; worker threads run ChannelService.process_webhook off the request
+path, one webhook at a time per sender
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+from flask import current_app
+from sqlalchemy import delete, event, exists, select, tuple_
+from sqlalchemy.orm import Session, aliased
+from src.models import db, generate_uuid
+from src.models.inbox import InboundWebhook
+from src.utils.workers import (
+    WorkerPool, backoff_delay, claim_rows, claimable, dead_letter, expire_leases, requeue_dead, reschedule
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+class InboxService:
+    """Service for queueing and processing inbound webhooks"""
+    
+    def __init__(self):
+        self.table = InboundWebhook.__table__
+        self.workers = WorkerPool('inbox', self.process_batch, 'WEBHOOK_POLL_INTERVAL')
+    
+    def enqueue(self, tenant_id: str, channel_type: str, payload: Dict[str, Any],
+                sender_id: Optional[str] = None) -> str:
+        """Store a webhook for one sender; it is picked up once the surrounding transaction commits
+        
+        Rows with a sender_id only ingest that sender's events and are ordered
+        behind the sender's earlier rows.
+        """
+        webhook_id = generate_uuid()
+        sender_key = f'{tenant_id}:{channel_type}:{sender_id}' if sender_id is not None else None
+        now = datetime.utcnow()
+        InboundWebhook(
+            id=webhook_id,
+            tenant_id=tenant_id,
+            channel_type=channel_type,
+            payload=payload,
+            sender_key=sender_key,
+            sender_id=sender_id,
+            received_at=now,
+            next_attempt_at=now
+        ).save()
+        
+        if current_app.config['WEBHOOK_WORKERS'] > 0:
+            self.workers.start(current_app._get_current_object(), current_app.config['WEBHOOK_WORKERS'])
+        return webhook_id
+    
+    def process_batch(self) -> int:
+        """Process one batch of due webhooks; returns how many were claimed"""
+        config = current_app.config
+        table = self.table
+        earlier = aliased(table)
+        expire_leases(table, config['WEBHOOK_MAX_ATTEMPTS'])
+        
+        # Skip webhooks whose sender still has an earlier one queued or in flight
+        candidate_ids = db.session.execute(
+            select(table.c.id)
+            .where(
+                claimable(table),
+                ~exists().where(
+                    earlier.c.sender_key == table.c.sender_key,
+                    earlier.c.status != 'dead',
+                    tuple_(earlier.c.received_at, earlier.c.id) < tuple_(table.c.received_at, table.c.id)
+                )
+            )
+            .order_by(table.c.received_at)
+            .limit(config['WEBHOOK_BATCH_SIZE'])
+        ).scalars().all()
+        
+        rows = claim_rows(table, candidate_ids, config['WEBHOOK_LEASE_SECONDS'])
+        for row in rows:
+            try:
+                self.handle(row)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Webhook {row.id} processing failed: {str(e)}")
+        return len(rows)
+    
+    def handle(self, row):
+        """Run the synchronous webhook pipeline for one leased row"""
+        from src.services.channel_service import channel_service
+        
+        result = channel_service.process_webhook(row.tenant_id, row.channel_type, row.payload, sender_id=row.sender_id)
+        
+        if result['success']:
+            db.session.execute(delete(self.table).where(self.table.c.id == row.id))
+            db.session.commit()
+            return
+        
+        config = current_app.config
+        attempts = row.attempts  # Counted when the row was leased
+        error = str(result.get('error'))
+        if not result.get('retryable') or attempts >= config['WEBHOOK_MAX_ATTEMPTS']:
+            logger.warning(f"Webhook {row.id} dead-lettered after {attempts} attempt(s): {error}")
+            dead_letter(self.table, row.id, attempts, error)
+            return
+        
+        delay = backoff_delay(attempts, config['WEBHOOK_BACKOFF_BASE'], config['WEBHOOK_BACKOFF_MAX'])
+        reschedule(self.table, row.id, delay, attempts=attempts, error=error)
+    
+    def requeue_dead(self, tenant_id: Optional[str] = None) -> int:
+        """Give dead-lettered webhooks a fresh set of attempts"""
+        return requeue_dead(self.table, tenant_id)
+
+# Global inbox service instance
+inbox_service = InboxService()
+
+# Wake the workers when a transaction that stored webhooks commits
+
+@event.listens_for(Session, 'after_flush')
+def _collect_received(session, flush_context):
+    if any(isinstance(obj, InboundWebhook) for obj in session.new):
+        session.info['inbox_received'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _notify_received(session):
+    if session.info.pop('inbox_received', False):
+        inbox_service.workers.notify()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_received(session):
+    session.info.pop('inbox_received', None)
@@ -0,0 +1,316 @@
+"""
+Ingest Service
+Core-level write paths for inbound messages that skip ORM instance construction
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+from sqlalchemy import insert, select, update
+from sqlalchemy.engine import Row
+from src.models import db, generate_uuid, unit_of_work
+from src.models.chatbot import rebuild_chatbot_stats
+from src.models.conversation import Conversation, Message
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class IngestService:
+    """Service for writing inbound messages without the ORM unit of work"""
+    
+    def __init__(self):
+        self.messages = Message.__table__
+        self.conversations = Conversation.__table__
+    
+    def find_active_conversation_ids(self, tenant_id: str, channel_type: str,
+                                     channel_user_ids: Iterable[str]) -> Dict[str, str]:
+        """Active conversation per platform user, for many users in one indexed query"""
+        return {
+            channel_user_id: conversation_id
+            for channel_user_id, conversation_id in db.session.execute(
+                select(self.conversations.c.channel_user_id, self.conversations.c.id)
+                .where(
+                    self.conversations.c.tenant_id == tenant_id,
+                    self.conversations.c.channel_type == channel_type,
+                    self.conversations.c.channel_user_id.in_(list(channel_user_ids)),
+                    self.conversations.c.status == 'active'
+                )
+                .order_by(self.conversations.c.created_at)
+            )
+        }
+    
+    def find_inbound_platform_ids(self, tenant_id: str, channel_type: str,
+                                  platform_message_ids: Iterable[str]) -> Set[str]:
+        """Which of these platform message IDs are already stored as inbound messages"""
+        return set(db.session.execute(
+            select(self.messages.c.platform_message_id)
+            .where(
+                self.messages.c.tenant_id == tenant_id,
+                self.messages.c.channel_type == channel_type,
+                self.messages.c.platform_message_id.in_(list(platform_message_ids)),
+                self.messages.c.sender_type == 'user'
+            )
+        ).scalars())
+    
+    def ingest_message(self, tenant_id: str, conversation_id: str, sender_type: str, content: str,
+                       sender_id: Optional[str] = None, message_type: str = 'text',
+                       platform_message_id: Optional[str] = None,
+                       meta_data: Optional[Dict[str, Any]] = None,
+                       channel_type: Optional[str] = None) -> Tuple[Row, Row]:
+        """
+        Insert a message and update its conversation summary
+        
+        Produces the same rows as Conversation.add_message with one
+        INSERT ... RETURNING and one UPDATE ... RETURNING. Runs in the
+        caller's transaction; commit via unit_of_work().
+        
+        Returns:
+            (message_row, conversation_row)
+        """
+        now = datetime.utcnow()
+        
+        message = db.session.execute(
+            insert(self.messages)
+            .values(
+                id=generate_uuid(),
+                tenant_id=tenant_id,
+                conversation_id=conversation_id,
+                channel_type=channel_type,
+                sender_type=sender_type,
+                sender_id=sender_id,
+                platform_message_id=platform_message_id,
+                content=content,
+                message_type=message_type,
+                meta_data=meta_data or {},
+                created_at=now,
+                updated_at=now
+            )
+            .returning(*self.messages.c)
+        ).one()
+        
+        conversation = db.session.execute(
+            update(self.conversations)
+            .where(self.conversations.c.id == conversation_id)
+            .values(**Conversation.summary_values(content, sender_type, now))
+            .returning(*self.conversations.c)
+        ).one()
+        
+        return message, conversation
+
+    def import_history(self, tenant_id: str, chatbot_id: str, records: Iterable[Dict[str, Any]],
+                       batch_size: int = 5000,
+                       progress: Optional[Callable[[Dict[str, int]], None]] = None) -> Dict[str, int]:
+        """
+        Bulk import conversation history exported from another platform
+        
+        Each record is one conversation with its messages nested under
+        "messages". Conversations are keyed by external_id per tenant and
+        messages by external_id per conversation, so re-running an
+        interrupted import skips rows that already landed. A repeated message
+        ID in a conversation this run created is a conflict in the export: it
+        is skipped and counted in conflicting_messages. Rows are written with
+        executemany, committing once per batch of about batch_size messages.
+        
+        Returns:
+            Totals of imported, skipped and conflicting conversations and messages
+        """
+        totals = {
+            'conversations': 0,
+            'messages': 0,
+            'skipped_conversations': 0,
+            'skipped_messages': 0,
+            'conflicting_messages': 0
+        }
+        # Conversations created by this run; skips in them are conflicts, not resumes
+        created = set()
+        
+        batch = []
+        pending = 0
+        for record in records:
+            batch.append(record)
+            pending += 1 + len(record.get('messages') or [])
+            
+            if pending >= batch_size:
+                self._import_batch(tenant_id, chatbot_id, batch, totals, created)
+                batch = []
+                pending = 0
+                if progress:
+                    progress(totals)
+        
+        if batch:
+            self._import_batch(tenant_id, chatbot_id, batch, totals, created)
+            if progress:
+                progress(totals)
+        
+        # Core inserts bypass the flush listeners that maintain chatbot_stats
+        rebuild_chatbot_stats([chatbot_id])
+        
+        return totals
+    
+    def _import_batch(self, tenant_id: str, chatbot_id: str, records: List[Dict[str, Any]],
+                      totals: Dict[str, int], created: Set[str]):
+        """Insert one batch of conversation records in a single transaction"""
+        conversations = self.conversations.c
+        messages = self.messages.c
+        now = datetime.utcnow()
+        
+        for record in records:
+            if not record.get('external_id'):
+                raise ValueError('Each conversation needs an external_id')
+        
+        with unit_of_work():
+            conversation_ids = dict(db.session.execute(
+                select(conversations.external_id, conversations.id)
+                .where(
+                    conversations.tenant_id == tenant_id,
+                    conversations.external_id.in_({str(r['external_id']) for r in records})
+                )
+            ).all())
+            
+            new_conversations = []
+            new_messages = []
+            resumed = set()
+            external_ids = {}
+            
+            for record in records:
+                external_id = str(record['external_id'])
+                rows = [
+                    self._message_values(tenant_id, external_id, index, message, now)
+                    for index, message in enumerate(record.get('messages') or [])
+                ]
+                
+                if external_id in conversation_ids:
+                    conversation_id = conversation_ids[external_id]
+                    resumed.add(conversation_id)
+                    totals['skipped_conversations'] += 1
+                else:
+                    conversation_id = generate_uuid()
+                    conversation_ids[external_id] = conversation_id
+                    created.add(conversation_id)
+                    new_conversations.append((conversation_id, external_id, record))
+                
+                external_ids[conversation_id] = external_id
+                for row in rows:
+                    row['conversation_id'] = conversation_id
+                new_messages.extend(rows)
+            
+            # Messages that landed in an earlier, interrupted run
+            existing = set()
+            if resumed:
+                existing = set(db.session.execute(
+                    select(messages.conversation_id, messages.external_id)
+                    .where(messages.conversation_id.in_(resumed))
+                ).tuples())
+            
+            inserted = {}
+            for row in new_messages:
+                key = (row['conversation_id'], row['external_id'])
+                if key not in existing:
+                    existing.add(key)
+                    inserted.setdefault(row['conversation_id'], []).append(row)
+                elif row['conversation_id'] in created:
+                    totals['conflicting_messages'] += 1
+                    logger.warning(
+                        f"History import: message {row['external_id']} appears twice in "
+                        f"conversation {external_ids[row['conversation_id']]}; kept the first"
+                    )
+                else:
+                    totals['skipped_messages'] += 1
+            new_messages = [row for rows in inserted.values() for row in rows]
+            
+            # Summaries describe the messages actually inserted
+            new_conversations = [
+                self._conversation_values(
+                    tenant_id, chatbot_id, conversation_id, external_id, record,
+                    inserted.get(conversation_id, []), now
+                )
+                for conversation_id, external_id, record in new_conversations
+            ]
+            
+            if new_conversations:
+                db.session.execute(insert(self.conversations), new_conversations)
+            if new_messages:
+                db.session.execute(insert(self.messages), new_messages)
+            
+            totals['conversations'] += len(new_conversations)
+            totals['messages'] += len(new_messages)
+        
+        if resumed:
+            Conversation.rebuild_summaries(resumed)
+    
+    def _conversation_values(self, tenant_id: str, chatbot_id: str, conversation_id: str, external_id: str,
+                             record: Dict[str, Any], messages: List[Dict[str, Any]], now: datetime) -> Dict[str, Any]:
+        """Column values for an imported conversation, with its summary computed from the batch"""
+        created_at = _parse_datetime(record.get('created_at')) or (
+            min(m['created_at'] for m in messages) if messages else now
+        )
+        last_message = max(messages, key=lambda m: m['created_at']) if messages else None
+        
+        if not record.get('channel_type') or not record.get('channel_user_id'):
+            raise ValueError(f'Conversation {external_id} needs channel_type and channel_user_id')
+        
+        return {
+            'id': conversation_id,
+            'tenant_id': tenant_id,
+            'chatbot_id': chatbot_id,
+            'external_id': external_id,
+            'channel_type': record['channel_type'],
+            'channel_user_id': str(record['channel_user_id']),
+            'status': record.get('status', 'resolved'),
+            'meta_data': record.get('meta_data') or {},
+            'started_at': created_at,
+            'ended_at': _parse_datetime(record.get('ended_at')),
+            'message_count': len(messages),
+            'last_message_content': last_message['content'] if last_message else None,
+            'last_message_sender': last_message['sender_type'] if last_message else None,
+            'last_message_at': last_message['created_at'] if last_message else None,
+            'created_at': created_at,
+            'updated_at': _parse_datetime(record.get('updated_at')) or (
+                last_message['created_at'] if last_message else created_at
+            )
+        }
+    
+    def _message_values(self, tenant_id: str, conversation_external_id: str, index: int,
+                        message: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+        """Column values for an imported message; conversation_id is filled in by the caller"""
+        if not message.get('sender_type') or message.get('content') is None:
+            raise ValueError(f'Messages in conversation {conversation_external_id} need sender_type and content')
+        
+        created_at = _parse_datetime(message.get('created_at')) or now
+        return {
+            'id': generate_uuid(),
+            'tenant_id': tenant_id,
+            # Position in the export keeps messages without their own ID idempotent
+            'external_id': str(message.get('external_id') or f'{conversation_external_id}:{index}'),
+            'sender_type': message['sender_type'],
+            'sender_id': message.get('sender_id'),
+            'platform_message_id': message.get('platform_message_id'),
+            'content': message['content'],
+            'message_type': message.get('message_type', 'text'),
+            'meta_data': message.get('meta_data') or {},
+            'created_at': created_at,
+            'updated_at': created_at
+        }
+
+def read_jsonl(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    """Yield one record per non-blank line of a JSONL stream"""
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f'Invalid JSON on line {line_number}: {e.msg}')
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO 8601 timestamp into naive UTC, the way timestamps are stored"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+# Global ingest service instance
+ingest_service = IngestService()
@@ -0,0 +1,149 @@
+"""
+Outbox Service
+Durable queue of outbound platform sends. Requests only insert a row; worker
+threads deliver it with per-platform/per-bot rate limits, exponential
+backoff and dead-lettering
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Optional
+from flask import current_app
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.orm import Session
+from src.models import db, generate_uuid
+from src.models.conversation import Message
+from src.models.outbox import OutboundMessage
+from src.utils.throttle import RateLimiter
+from src.utils.workers import (
+    WorkerPool, backoff_delay, claim_rows, claimable, dead_letter, expire_leases, requeue_dead, reschedule
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Client errors that will fail the same way on every retry
+PERMANENT_STATUS_CODES = frozenset(range(400, 500)) - {408, 409, 425, 429}
+
+class OutboxService:
+    """Service for queueing and delivering outbound messages"""
+    
+    def __init__(self):
+        self.table = OutboundMessage.__table__
+        self.rate_limiter = RateLimiter()
+        self.workers = WorkerPool('outbox', self.process_batch, 'OUTBOX_POLL_INTERVAL')
+    
+    def enqueue(self, tenant_id: str, channel_type: str, recipient_id: str, content: str,
+                message_id: Optional[str] = None, options: Optional[Dict[str, Any]] = None) -> str:
+        """Queue a send; it is picked up once the surrounding transaction commits
+        
+        Returns the outbox row id (the row may already be delivered and gone).
+        """
+        outbound_id = generate_uuid()
+        OutboundMessage(
+            id=outbound_id,
+            tenant_id=tenant_id,
+            channel_type=channel_type,
+            recipient_id=recipient_id,
+            content=content,
+            message_id=message_id,
+            options=options or {},
+            next_attempt_at=datetime.utcnow()
+        ).save()
+        
+        if current_app.config['OUTBOX_WORKERS'] > 0:
+            self.workers.start(current_app._get_current_object(), current_app.config['OUTBOX_WORKERS'])
+        return outbound_id
+    
+    def process_batch(self) -> int:
+        """Deliver one batch of due rows; returns how many were claimed"""
+        config = current_app.config
+        expire_leases(self.table, config['OUTBOX_MAX_ATTEMPTS'])
+        candidate_ids = db.session.execute(
+            select(self.table.c.id)
+            .where(claimable(self.table))
+            .order_by(self.table.c.next_attempt_at)
+            .limit(config['OUTBOX_BATCH_SIZE'])
+        ).scalars().all()
+        
+        rows = claim_rows(self.table, candidate_ids, config['OUTBOX_LEASE_SECONDS'])
+        for row in rows:
+            try:
+                self.deliver(row)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Outbox delivery of {row.id} failed: {str(e)}")
+        return len(rows)
+    
+    def rate_limits(self, row) -> Dict[Any, float]:
+        config = current_app.config
+        limits = {}
+        platform_rate = config['OUTBOX_PLATFORM_RATE_LIMITS'].get(row.channel_type)
+        if platform_rate and platform_rate > 0:
+            limits[row.channel_type] = platform_rate
+        bot_rate = config['OUTBOX_BOT_RATE_LIMITS'].get(row.channel_type)
+        if bot_rate and bot_rate > 0:
+            # One adapter (bot credentials) per tenant and channel type
+            limits[(row.tenant_id, row.channel_type)] = bot_rate
+        return limits
+    
+    def deliver(self, row):
+        """Send one leased row and record the outcome"""
+        from src.services.channel_service import channel_service
+        
+        wait = self.rate_limiter.acquire(self.rate_limits(row))
+        if wait:
+            # Over the rate limit: hand the row back without spending an attempt
+            reschedule(self.table, row.id, wait, attempts=row.attempts - 1)
+            return
+        
+        try:
+            result = channel_service.deliver_message(
+                row.tenant_id, row.channel_type, row.recipient_id, row.content, **(row.options or {})
+            )
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+        
+        if result['success']:
+            if row.message_id and result.get('message_id') is not None:
+                db.session.execute(
+                    update(Message.__table__)
+                    .where(Message.__table__.c.id == row.message_id)
+                    .values(platform_message_id=str(result['message_id']))
+                )
+            db.session.execute(delete(self.table).where(self.table.c.id == row.id))
+            db.session.commit()
+            return
+        
+        config = current_app.config
+        attempts = row.attempts  # Counted when the row was leased
+        error = str(result.get('error'))
+        if result.get('status_code') in PERMANENT_STATUS_CODES or attempts >= config['OUTBOX_MAX_ATTEMPTS']:
+            logger.warning(f"Outbound message {row.id} dead-lettered after {attempts} attempt(s): {error}")
+            dead_letter(self.table, row.id, attempts, error)
+            return
+        
+        delay = backoff_delay(attempts, config['OUTBOX_BACKOFF_BASE'], config['OUTBOX_BACKOFF_MAX'])
+        reschedule(self.table, row.id, delay, attempts=attempts, error=error)
+    
+    def requeue_dead(self, tenant_id: Optional[str] = None) -> int:
+        """Give dead-lettered sends a fresh set of attempts"""
+        return requeue_dead(self.table, tenant_id)
+
+# Global outbox service instance
+outbox_service = OutboxService()
+
+# Wake the workers when a transaction that queued sends commits
+
+@event.listens_for(Session, 'after_flush')
+def _collect_enqueued(session, flush_context):
+    if any(isinstance(obj, OutboundMessage) for obj in session.new):
+        session.info['outbox_enqueued'] = True
+
+@event.listens_for(Session, 'after_commit')
+def _notify_enqueued(session):
+    if session.info.pop('outbox_enqueued', False):
+        outbox_service.workers.notify()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_enqueued(session):
+    session.info.pop('outbox_enqueued', None)
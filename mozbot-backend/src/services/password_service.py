@@ -0,0 +1,91 @@
+"""
+Password Service
+Runs password hashing and verification in a bounded process pool so logins
+cannot tie up request threads, and keeps stored hashes on current parameters
+"""
+
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+class PasswordServiceBusy(Exception):
+    """Raised when the hash pool queue is full or a hash did not finish in time"""
+
+class PasswordService:
+    """Service for CPU-heavy password hash work"""
+    
+    def __init__(self):
+        self._executor = None
+        self._executor_pid = None
+        self._slots = None
+        self._lock = threading.Lock()
+        self._method_prefix = {}
+    
+    def _pool(self):
+        """Process pool and queue slots for this process (recreated after fork)"""
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                config = current_app.config
+                self._executor = ProcessPoolExecutor(max_workers=config['PASSWORD_HASH_WORKERS'])
+                self._executor_pid = os.getpid()
+                # Running plus queued hashes; anything beyond is rejected immediately
+                self._slots = threading.BoundedSemaphore(config['PASSWORD_HASH_WORKERS'] + config['PASSWORD_HASH_QUEUE_LIMIT'])
+            return self._executor, self._slots
+    
+    def _run(self, fn, *args):
+        if current_app.config['PASSWORD_HASH_WORKERS'] <= 0:
+            return fn(*args)
+        
+        executor, slots = self._pool()
+        if not slots.acquire(blocking=False):
+            raise PasswordServiceBusy('Password hashing queue is full')
+        
+        try:
+            future = executor.submit(fn, *args)
+        except BrokenProcessPool:
+            slots.release()
+            self._reset_pool()
+            raise PasswordServiceBusy('Password hashing pool restarted')
+        
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=current_app.config['PASSWORD_HASH_TIMEOUT'])
+        except FutureTimeoutError:
+            raise PasswordServiceBusy('Password hashing timed out')
+        except BrokenProcessPool:
+            self._reset_pool()
+            raise PasswordServiceBusy('Password hashing pool restarted')
+    
+    def _reset_pool(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def verify(self, password_hash: str, password: str) -> bool:
+        """Check a password against a stored hash; raises PasswordServiceBusy when saturated"""
+        if not password_hash:
+            return False
+        return self._run(check_password_hash, password_hash, password)
+    
+    def hash(self, password: str) -> str:
+        """Hash a password with the configured method; raises PasswordServiceBusy when saturated"""
+        return self._run(generate_password_hash, password, current_app.config['PASSWORD_HASH_METHOD'])
+    
+    def needs_rehash(self, password_hash: str) -> bool:
+        """Whether a stored hash was made with other parameters than PASSWORD_HASH_METHOD"""
+        method = current_app.config['PASSWORD_HASH_METHOD']
+        prefix = self._method_prefix.get(method)
+        if prefix is None:
+            # Werkzeug expands defaults (e.g. 'scrypt' -> 'scrypt:32768:8:1'); learn the full form once
+            prefix = self._method_prefix[method] = generate_password_hash('', method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != prefix
+
+# Global password service instance
+password_service = PasswordService()
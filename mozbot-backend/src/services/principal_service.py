@@ -0,0 +1,105 @@
+"""
+Principal Service
+Caches who a user is and which tenants they belong to, so authorization
+checks in auth_required/tenant_required usually run without any queries
+"""
+
+from typing import Dict, NamedTuple, Optional
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from src.models import db
+from src.models.user import User
+from src.models.tenant import UserTenant
+from src.utils.cache import TTLCache
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Membership(NamedTuple):
+    role: str
+    permissions: dict
+
+class Principal:
+    """Authenticated user with their memberships; stands in for User in g.current_user"""
+    __slots__ = ('id', 'email', 'is_active', 'memberships')
+    
+    def __init__(self, id: str, email: str, is_active: bool, memberships: Dict[str, Membership]):
+        self.id = id
+        self.email = email
+        self.is_active = is_active
+        self.memberships = memberships
+    
+    def __repr__(self):
+        return f'<Principal {self.email}>'
+    
+    def has_tenant_access(self, tenant_id: str) -> bool:
+        """Check if user has access to a specific tenant"""
+        return tenant_id in self.memberships
+    
+    def get_tenant_role(self, tenant_id: str) -> Optional[str]:
+        """Get user's role in a specific tenant"""
+        membership = self.memberships.get(tenant_id)
+        return membership.role if membership else None
+
+class PrincipalService:
+    """Service for resolving and caching request principals"""
+    
+    def __init__(self, maxsize: int = 10000):
+        self.cache = TTLCache(maxsize=maxsize)
+    
+    def get_principal(self, user_id: str) -> Optional[Principal]:
+        """Principal for a user ID, from the cache or two column queries"""
+        principal = self.cache.get(user_id)
+        if principal is not None:
+            return principal
+        
+        principal = self.load_principal(user_id)
+        ttl = current_app.config['PRINCIPAL_CACHE_TTL']
+        if principal is not None and ttl > 0:
+            self.cache.set(user_id, principal, ttl=ttl)
+        return principal
+    
+    def load_principal(self, user_id: str) -> Optional[Principal]:
+        """Read a principal from the database, bypassing the cache"""
+        user = db.session.execute(
+            select(User.id, User.email, User.is_active).where(User.id == user_id)
+        ).first()
+        if user is None:
+            return None
+        
+        memberships = {
+            row.tenant_id: Membership(role=row.role, permissions=row.permissions or {})
+            for row in db.session.execute(
+                select(UserTenant.tenant_id, UserTenant.role, UserTenant.permissions)
+                .where(UserTenant.user_id == user_id)
+            )
+        }
+        
+        return Principal(user.id, user.email, bool(user.is_active), memberships)
+    
+    def invalidate_user(self, user_id: str):
+        self.cache.delete(user_id)
+
+# Global principal service instance
+principal_service = PrincipalService()
+
+# Invalidation: collect affected users per flush, apply once committed.
+# Bulk Core updates bypass this and are only picked up when entries expire.
+
+@event.listens_for(Session, 'after_flush')
+def _collect_principal_changes(session, flush_context):
+    users = session.info.setdefault('principal_invalidations', set())
+    
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            users.add(obj.id)
+        elif isinstance(obj, UserTenant):
+            users.add(obj.user_id)
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _apply_principal_changes(session):
+    # Also on rollback: a spurious invalidation only costs one reload
+    for user_id in session.info.pop('principal_invalidations', set()):
+        principal_service.invalidate_user(user_id)
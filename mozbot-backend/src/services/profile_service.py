@@ -0,0 +1,94 @@
+"""
+Profile Service
+Per-process cache of platform user profiles (adapter get_user_info). Profiles
+are kept for a per-channel TTL, lookups for users the platform does not know
+are cached negatively, and concurrent lookups for the same user share one
+in-flight fetch
+"""
+
+from concurrent.futures import Future
+from typing import Any, Dict
+from flask import current_app
+from src.config import Config
+from src.utils.cache import TTLCache
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Platform answers that will not change on a retry (unknown or blocked user)
+NOT_FOUND_STATUS_CODES = frozenset({400, 403, 404})
+
+class ProfileService:
+    """Service for cached, coalesced platform user profile lookups"""
+    
+    def __init__(self):
+        self.profiles = TTLCache(maxsize=Config.PROFILE_CACHE_SIZE)
+        self._in_flight = {}  # key -> Future shared by every caller waiting on that fetch
+        self._lock = threading.Lock()
+    
+    def get_profile(self, tenant_id: str, channel_type: str, user_id: str) -> Dict[str, Any]:
+        """Profile of a platform user, in the adapter's get_user_info format"""
+        key = (tenant_id, channel_type, str(user_id))
+        profile = self.profiles.get(key)
+        if profile is not None:
+            return dict(profile)
+        
+        with self._lock:
+            # Re-check: a fetch may have finished while we waited for the lock
+            profile = self.profiles.get(key)
+            if profile is not None:
+                return dict(profile)
+            
+            pending = self._in_flight.get(key)
+            if pending is None:
+                pending = self._in_flight[key] = Future()
+                leader = True
+            else:
+                leader = False
+        
+        if not leader:
+            try:
+                return dict(pending.result(timeout=current_app.config['PROFILE_FETCH_WAIT']))
+            except Exception:
+                return {'success': False, 'error': 'Timed out waiting for profile lookup'}
+        
+        profile = None
+        try:
+            profile = self.fetch(tenant_id, channel_type, user_id)
+            ttl = self.ttl_for(channel_type, profile)
+            if ttl > 0:
+                self.profiles.set(key, profile, ttl=ttl)
+            return dict(profile)
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            pending.set_result(profile if profile is not None else {'success': False, 'error': 'Profile lookup failed'})
+    
+    def fetch(self, tenant_id: str, channel_type: str, user_id: str) -> Dict[str, Any]:
+        """Ask the platform; never raises"""
+        from src.services.channel_service import channel_service
+        
+        try:
+            adapter = channel_service.get_adapter(tenant_id, channel_type)
+            if not adapter:
+                return {'success': False, 'error': f'Channel {channel_type} not configured for tenant'}
+            return adapter.get_user_info(user_id)
+        except Exception as e:
+            logger.error(f"Profile lookup for {channel_type} user {user_id} failed: {str(e)}")
+            return {'success': False, 'error': str(e)}
+    
+    def ttl_for(self, channel_type: str, profile: Dict[str, Any]) -> float:
+        config = current_app.config
+        if profile.get('success'):
+            return config['PROFILE_CACHE_TTLS'].get(channel_type, config['PROFILE_CACHE_TTL'])
+        if profile.get('status_code') in NOT_FOUND_STATUS_CODES:
+            return config['PROFILE_NEGATIVE_TTL']
+        # Outages and rate limits: absorb the burst, then ask again soon
+        return config['PROFILE_ERROR_TTL']
+    
+    def invalidate(self, tenant_id: str, channel_type: str, user_id: str):
+        self.profiles.delete((tenant_id, channel_type, str(user_id)))
+
+# Global profile service instance
+profile_service = ProfileService()
@@ -0,0 +1,96 @@
+"""
+Revocation Service
+Denylist of revoked JWT IDs, mirrored in memory so the per-request check in
+the token_in_blocklist_loader needs no database round trip
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+from flask import current_app
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
+from src.models import db, unit_of_work
+from src.models.user import RevokedToken
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class RevocationService:
+    """Service for revoking tokens and checking revocations"""
+    
+    def __init__(self):
+        self._revoked = {}  # jti -> expires_at
+        self._watermark = None  # Latest revoked_at seen in the table
+        self._next_refresh = 0.0
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+    
+    def is_revoked(self, jti: str) -> bool:
+        """O(1) membership check against the in-memory mirror"""
+        if time.monotonic() >= self._next_refresh:
+            self.refresh()
+        
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > datetime.utcnow()
+    
+    def revoke(self, jti: str, expires_at: datetime, user_id: Optional[str] = None, token_type: str = 'access'):
+        """Record a revoked token; effective immediately in this process"""
+        with unit_of_work():
+            if db.session.get(RevokedToken, jti) is None:
+                db.session.add(RevokedToken(jti=jti, user_id=user_id, token_type=token_type, expires_at=expires_at))
+            
+            # Piggyback pruning on revocations, which already write
+            if time.monotonic() >= self._next_prune:
+                self._next_prune = time.monotonic() + current_app.config['REVOCATION_PRUNE_INTERVAL']
+                self.prune_expired()
+        
+        self._revoked[jti] = expires_at
+    
+    def refresh(self):
+        """Pull revocations made by other processes since the last refresh"""
+        if not self._lock.acquire(blocking=False):
+            return  # Another thread is already refreshing
+        
+        try:
+            config = current_app.config
+            table = RevokedToken.__table__.c
+            now = datetime.utcnow()
+            
+            query = select(table.jti, table.expires_at, table.revoked_at).where(table.expires_at > now)
+            if self._watermark is not None:
+                # Overlap so rows committed late with an earlier revoked_at are not missed
+                query = query.where(table.revoked_at > self._watermark - timedelta(seconds=config['REVOCATION_REFRESH_OVERLAP']))
+            
+            for jti, expires_at, revoked_at in db.session.execute(query):
+                self._revoked[jti] = expires_at
+                if self._watermark is None or revoked_at > self._watermark:
+                    self._watermark = revoked_at
+            
+            if self._watermark is None:
+                self._watermark = now
+            
+            # Expired tokens are rejected by signature checks anyway. revoke() writes
+            # without the lock, so iterate over a snapshot
+            for jti, expires_at in list(self._revoked.items()):
+                if expires_at <= now:
+                    self._revoked.pop(jti, None)
+            
+            self._next_refresh = time.monotonic() + config['REVOCATION_REFRESH_SECONDS']
+        except SQLAlchemyError as e:
+            # Database unavailable: keep serving from the current mirror; retry on the next check
+            logger.error(f"Revocation refresh failed: {str(e)}")
+            self._next_refresh = time.monotonic() + current_app.config['REVOCATION_REFRESH_SECONDS']
+        finally:
+            self._lock.release()
+    
+    def prune_expired(self) -> int:
+        """Delete rows for tokens that have expired; returns the number deleted"""
+        result = db.session.execute(
+            delete(RevokedToken.__table__).where(RevokedToken.__table__.c.expires_at <= datetime.utcnow())
+        )
+        return result.rowcount
+
+# Global revocation service instance
+revocation_service = RevocationService()
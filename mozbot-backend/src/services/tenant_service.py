@@ -0,0 +1,89 @@
+"""
+Tenant Service
+Cached, read-mostly tenant snapshots (plan, status, settings, counts)
+"""
+
+from typing import Any, Dict, Optional
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from src.models import db
+from src.models.chatbot import Chatbot
+from src.models.tenant import Tenant, UserTenant, load_tenant_counts
+from src.utils.cache import TTLCache
+import copy
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TenantSnapshot:
+    """Read-only view of Tenant.to_dict(); stands in for Tenant in g.current_tenant"""
+    __slots__ = ('_data',)
+    
+    def __init__(self, data: Dict[str, Any]):
+        self._data = data
+    
+    def __getattr__(self, name):
+        try:
+            value = self._data[name]
+        except KeyError:
+            raise AttributeError(name)
+        # Callers must not be able to mutate the cached copy
+        return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+    
+    def __repr__(self):
+        return f'<TenantSnapshot {self._data.get("name")}>'
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return copy.deepcopy(self._data)
+
+class TenantService:
+    """Service for tenant snapshots"""
+    
+    def __init__(self, maxsize: int = 10000):
+        self.cache = TTLCache(maxsize=maxsize)
+    
+    def get_snapshot(self, tenant_id: str) -> Optional[TenantSnapshot]:
+        """Snapshot from the cache, or one row lookup plus two grouped counts"""
+        snapshot = self.cache.get(tenant_id)
+        if snapshot is not None:
+            return snapshot
+        
+        tenant = db.session.get(Tenant, tenant_id)
+        if tenant is None:
+            return None
+        
+        snapshot = TenantSnapshot(tenant.to_dict())
+        ttl = current_app.config['TENANT_CACHE_TTL']
+        if ttl > 0:
+            self.cache.set(tenant_id, snapshot, ttl=ttl)
+        return snapshot
+    
+    def invalidate(self, tenant_id: str):
+        self.cache.delete(tenant_id)
+
+# Global tenant service instance
+tenant_service = TenantService()
+
+# Invalidation: tenants whose row or counts changed in a flush are dropped
+# once the transaction ends. Bulk Core writes are only picked up on expiry.
+
+@event.listens_for(Session, 'after_flush')
+def _collect_tenant_changes(session, flush_context):
+    tenants = session.info.setdefault('tenant_invalidations', set())
+    
+    for obj in session.dirty:
+        if isinstance(obj, Tenant):
+            tenants.add(obj.id)
+    
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Tenant):
+            tenants.add(obj.id)
+        elif isinstance(obj, (Chatbot, UserTenant)):
+            tenants.add(obj.tenant_id)
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _apply_tenant_changes(session):
+    for tenant_id in session.info.pop('tenant_invalidations', set()):
+        tenant_service.invalidate(tenant_id)
@@ -1,16 +1,25 @@
 from functools import wraps
 from flask import request, jsonify, g
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from src.models.user import User
-from src.models.tenant import Tenant
+from sqlalchemy import tuple_
+from src.services.principal_service import principal_service
+from src.services.tenant_service import tenant_service
+from datetime import datetime
+from operator import attrgetter
+import base64
+import json
 
 def auth_required(f):
-    """Decorator to require authentication"""
+    """Decorator to require authentication
+    
+    g.current_user is a cached Principal (id, email, is_active, memberships)
+    rather than a User row, so a warm cache costs no queries.
+    """
     @wraps(f)
     @jwt_required()
     def decorated_function(*args, **kwargs):
         current_user_id = get_jwt_identity()
-        current_user = User.query.get(current_user_id)
+        current_user = principal_service.get_principal(current_user_id)
         
         if not current_user or not current_user.is_active:
             return jsonify({'success': False, 'error': {'message': 'User not found or inactive'}}), 401
@@ -20,28 +29,38 @@ def auth_required(f):
     
     return decorated_function
 
+def get_request_tenant_id(kwargs):
+    """Tenant ID from URL parameters, X-Tenant-ID header, query string or JSON body"""
+    tenant_id = kwargs.get('tenant_id') or request.headers.get('X-Tenant-ID') or request.args.get('tenant_id')
+    if tenant_id:
+        return tenant_id
+    
+    # GET requests usually have no JSON body; don't fail with 415 on them
+    data = request.get_json(silent=True)
+    return data.get('tenant_id') if isinstance(data, dict) else None
+
 def tenant_required(f):
     """Decorator to require tenant access"""
     @wraps(f)
     @auth_required
     def decorated_function(*args, **kwargs):
-        # Get tenant_id from URL parameters or request body
-        tenant_id = kwargs.get('tenant_id') or request.json.get('tenant_id') if request.json else None
+        tenant_id = get_request_tenant_id(kwargs)
         
         if not tenant_id:
             return jsonify({'success': False, 'error': {'message': 'Tenant ID required'}}), 400
         
         # Check if user has access to this tenant
-        if not g.current_user.has_tenant_access(tenant_id):
+        membership = g.current_user.memberships.get(tenant_id)
+        if not membership:
             return jsonify({'success': False, 'error': {'message': 'Access denied to this tenant'}}), 403
         
-        # Get tenant and add to context
-        tenant = Tenant.query.get(tenant_id)
+        # Cached snapshot; no query on a warm cache
+        tenant = tenant_service.get_snapshot(tenant_id)
         if not tenant:
             return jsonify({'success': False, 'error': {'message': 'Tenant not found'}}), 404
         
         g.current_tenant = tenant
-        g.current_user_role = g.current_user.get_tenant_role(tenant_id)
+        g.current_user_role = membership.role
         
         return f(*args, **kwargs)
     
@@ -86,8 +105,12 @@ def validate_json(*required_fields):
         return decorated_function
     return decorator
 
-def paginate_query(query, page=1, per_page=20, max_per_page=100):
-    """Paginate a SQLAlchemy query"""
+def paginate_query(query, page=1, per_page=20, max_per_page=100, serializer=None):
+    """Paginate a SQLAlchemy query
+    
+    serializer receives the list of rows on the page and returns the
+    serialized items, so callers can batch per-page work.
+    """
     if per_page > max_per_page:
         per_page = max_per_page
     
@@ -98,7 +121,7 @@ def paginate_query(query, page=1, per_page=20, max_per_page=100):
     )
     
     return {
-        'items': [item.to_dict() for item in paginated.items],
+        'items': serializer(paginated.items) if serializer else [item.to_dict() for item in paginated.items],
         'pagination': {
             'page': page,
             'per_page': per_page,
@@ -109,3 +132,131 @@ def paginate_query(query, page=1, per_page=20, max_per_page=100):
         }
     }
 
+def encode_cursor(values):
+    """Encode keyset values into an opaque URL-safe cursor"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, order_columns):
+    """Decode a cursor produced by encode_cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError('Invalid cursor') from e
+    
+    if not isinstance(payload, list) or len(payload) != len(order_columns):
+        raise ValueError('Invalid cursor')
+    
+    values = []
+    for column, value in zip(order_columns, payload):
+        if value is not None and column.type.python_type is datetime:
+            try:
+                value = datetime.fromisoformat(value)
+            except (ValueError, TypeError) as e:
+                raise ValueError('Invalid cursor') from e
+        values.append(value)
+    return values
+
+def cursor_paginate_query(query, order_columns, cursor=None, per_page=20, max_per_page=100,
+                          descending=False, include_total=False, serializer=None):
+    """Keyset-paginate a SQLAlchemy query on order_columns, e.g. (created_at, id)
+    
+    The last column must be unique so the ordering is total. Each page is an
+    index range scan regardless of depth, and COUNT(*) only runs when
+    include_total is set.
+    """
+    # At least one row per page: the next cursor is taken from the last row
+    per_page = max(1, min(per_page, max_per_page))
+    
+    ordering = [column.desc() if descending else column.asc() for column in order_columns]
+    page_query = query.order_by(None).order_by(*ordering)
+    
+    if cursor:
+        key = tuple_(*order_columns)
+        values = tuple_(*decode_cursor(cursor, order_columns))
+        page_query = page_query.filter(key < values if descending else key > values)
+    
+    # One extra row tells us whether another page exists without counting
+    rows = page_query.limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column in order_columns])
+    
+    pagination = {
+        'per_page': per_page,
+        'next_cursor': next_cursor,
+        'has_next': has_next
+    }
+    
+    if include_total:
+        pagination['total'] = query.order_by(None).count()
+    
+    return {
+        'items': serializer(rows) if serializer else [item.to_dict() for item in rows],
+        'pagination': pagination
+    }
+
+def paginate_items(items, page=1, per_page=20, max_per_page=100, serializer=None):
+    """paginate_query for an ordered list that is already in memory"""
+    if per_page > max_per_page:
+        per_page = max_per_page
+    
+    total = len(items)
+    pages = -(-total // per_page) if per_page > 0 else 0
+    start = (page - 1) * per_page
+    rows = items[start:start + per_page] if page > 0 else []
+    
+    return {
+        'items': serializer(rows) if serializer else [item.to_dict() for item in rows],
+        'pagination': {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'pages': pages,
+            'has_next': page < pages,
+            'has_prev': page > 1
+        }
+    }
+
+def cursor_paginate_items(items, order_columns, cursor=None, per_page=20, max_per_page=100,
+                          descending=False, include_total=False, serializer=None):
+    """cursor_paginate_query for a list already sorted on order_columns; cursors are interchangeable"""
+    per_page = max(1, min(per_page, max_per_page))
+    
+    key = attrgetter(*[column.key for column in order_columns])
+    if len(order_columns) == 1:
+        key = lambda item, getter=key: (getter(item),)
+    
+    rows = items
+    if cursor:
+        after = tuple(decode_cursor(cursor, order_columns))
+        rows = [item for item in items if (key(item) < after if descending else key(item) > after)]
+    
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    
+    pagination = {
+        'per_page': per_page,
+        'next_cursor': encode_cursor(key(rows[-1])) if has_next else None,
+        'has_next': has_next
+    }
+    
+    if include_total:
+        pagination['total'] = len(items)
+    
+    return {
+        'items': serializer(rows) if serializer else [item.to_dict() for item in rows],
+        'pagination': pagination
+    }
+
+def wants_cursor_pagination():
+    """Cursor mode is opt-in: pass cursor= (empty for the first page)"""
+    return 'cursor' in request.args
+
+def wants_total():
+    """Whether the client asked for the total count in cursor mode"""
+    return request.args.get('include_total', '').lower() in ('1', 'true', 'yes')
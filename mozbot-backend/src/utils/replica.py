@@ -0,0 +1,58 @@
+from functools import wraps
+from flask import current_app, request
+from src.models import replica_reads, replicas_configured
+import time
+
+# Time of the client's last write; travels with the client so whichever
+# process serves its next request can see it
+LAST_WRITE_COOKIE = 'last_write'
+LAST_WRITE_HEADER = 'X-Last-Write'
+
+def record_write(response):
+    """Pin the client's reads to the primary for REPLICA_READ_YOUR_WRITES_SECONDS
+    
+    Sets the last-write cookie and header; API clients that do not keep
+    cookies echo the header on their next requests.
+    """
+    window = current_app.config['REPLICA_READ_YOUR_WRITES_SECONDS']
+    if window <= 0:
+        return
+    
+    written_at = f'{time.time():.3f}'
+    response.set_cookie(LAST_WRITE_COOKIE, written_at, max_age=window, httponly=True,
+                        samesite='Lax', secure=request.is_secure)
+    response.headers[LAST_WRITE_HEADER] = written_at
+
+def recently_wrote():
+    """Whether the client wrote within the read-your-writes window"""
+    try:
+        written_at = float(request.headers.get(LAST_WRITE_HEADER) or request.cookies.get(LAST_WRITE_COOKIE))
+    except (TypeError, ValueError):
+        return False
+    return time.time() - written_at < current_app.config['REPLICA_READ_YOUR_WRITES_SECONDS']
+
+def wants_primary():
+    """Whether this request must read from the primary
+    
+    Clients can force it with the X-Consistent-Read: true header; clients
+    that just wrote get it automatically so they see their own changes.
+    """
+    if request.headers.get('X-Consistent-Read', '').lower() in ('1', 'true', 'yes'):
+        return True
+    
+    return recently_wrote()
+
+def read_replica(f):
+    """Decorator to serve a read-only endpoint from a read replica
+    
+    Place it below the auth decorators so authentication reads the primary.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not replicas_configured() or wants_primary():
+            return f(*args, **kwargs)
+        
+        with replica_reads():
+            return f(*args, **kwargs)
+    
+    return decorated_function
@@ -0,0 +1,70 @@
+from src.utils.cache import TTLCache
+import threading
+import time
+
+class AttemptThrottle:
+    """Fixed-window counter of failed attempts per key (account, IP, ...)"""
+    
+    def __init__(self, window=900, maxsize=100000):
+        self.window = window
+        self._counts = TTLCache(maxsize=maxsize, ttl=window)
+        self._lock = threading.Lock()
+    
+    def _bucket(self, key, now):
+        return (key, int(now // self.window))
+    
+    def record_failure(self, *keys):
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                bucket = self._bucket(key, now)
+                self._counts.set(bucket, self._counts.get(bucket, 0) + 1)
+    
+    def retry_after(self, limits):
+        """Seconds until the first over-limit key frees up, or 0
+        
+        limits maps each key to the number of failures it may have per window.
+        """
+        now = time.time()
+        for key, limit in limits.items():
+            if self._counts.get(self._bucket(key, now), 0) >= limit:
+                return int(self.window - now % self.window) + 1
+        return 0
+    
+    def reset(self, *keys):
+        now = time.time()
+        for key in keys:
+            self._counts.delete(self._bucket(key, now))
+
+class RateLimiter:
+    """Token buckets per key (platform, bot, ...), refilled at each key's rate per second
+    
+    Buckets live in this process; limits hold only while it is the only sender.
+    """
+    
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+    
+    def acquire(self, limits):
+        """Take one token from every bucket, or none if any is empty
+        
+        limits maps each key to its rate; returns 0 when the tokens were
+        taken, otherwise the seconds until the emptiest bucket refills.
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = {}
+            wait = 0
+            for key, rate in limits.items():
+                # Burst is capped at one second's worth of tokens (at least one)
+                burst = max(rate, 1)
+                tokens, stamp = self._buckets.get(key, (burst, now))
+                tokens = min(burst, tokens + (now - stamp) * rate)
+                levels[key] = tokens
+                if tokens < 1:
+                    wait = max(wait, (1 - tokens) / rate)
+            
+            for key, tokens in levels.items():
+                self._buckets[key] = (tokens if wait else tokens - 1, now)
+            return wait
@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, update
+from src.models import db
+import logging
+import os
+import random
+import threading
+
+logger = logging.getLogger(__name__)
+
+class WorkerPool:
+    """Daemon threads that keep running a batch function inside an app context
+    
+    run_batch returns how many items it handled; workers sleep for the
+    poll interval (or until notify()) only when a batch came back empty.
+    """
+    
+    def __init__(self, name, run_batch, poll_interval_key):
+        self.name = name
+        self.run_batch = run_batch
+        self.poll_interval_key = poll_interval_key
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+    
+    def start(self, app, count):
+        """Start count threads in this process unless already running"""
+        with self._lock:
+            if self._pid == os.getpid() and any(thread.is_alive() for thread in self._threads):
+                return
+            
+            # Threads do not survive a fork; each process starts its own
+            self._stopping.clear()
+            self._threads = [
+                threading.Thread(target=self._work, args=(app,), name=f'{self.name}-worker-{index}', daemon=True)
+                for index in range(count)
+            ]
+            self._pid = os.getpid()
+            for thread in self._threads:
+                thread.start()
+    
+    def notify(self):
+        """Wake idle workers (new rows were committed)"""
+        self._wake.set()
+    
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+    
+    def _work(self, app):
+        while not self._stopping.is_set():
+            with app.app_context():
+                try:
+                    processed = self.run_batch()
+                except Exception as e:
+                    logger.error(f"{self.name} batch failed: {str(e)}")
+                    processed = 0
+                finally:
+                    db.session.remove()
+                poll_interval = app.config[self.poll_interval_key]
+            
+            if not processed:
+                self._wake.wait(poll_interval)
+                self._wake.clear()
+
+def claimable(table):
+    """Rows of a queue table (status/next_attempt_at/locked_until) that are due"""
+    now = datetime.utcnow()
+    return or_(
+        and_(table.c.status == 'pending', table.c.next_attempt_at <= now),
+        and_(table.c.status == 'processing', table.c.locked_until < now)  # Worker died mid-item
+    )
+
+def claim_rows(table, candidate_ids, lease_seconds):
+    """Lease the given rows to this worker and commit
+    
+    Each row is taken with a conditional UPDATE, so concurrent workers
+    (threads or processes) never lease the same row twice. The attempt is
+    counted when the row is leased, so items whose worker dies or raises
+    still run out of attempts (see expire_leases); returned rows carry the
+    incremented count.
+    """
+    locked_until = datetime.utcnow() + timedelta(seconds=lease_seconds)
+    claimed = []
+    for row_id in candidate_ids:
+        row = db.session.execute(
+            update(table)
+            .where(table.c.id == row_id, claimable(table))
+            .values(status='processing', locked_until=locked_until, attempts=table.c.attempts + 1)
+            .returning(*table.c)
+        ).first()
+        if row is not None:
+            claimed.append(row)
+    
+    db.session.commit()
+    return claimed
+
+def expire_leases(table, max_attempts):
+    """Dead-letter leased rows whose lease ran out on their last attempt"""
+    result = db.session.execute(
+        update(table)
+        .where(
+            table.c.status == 'processing',
+            table.c.locked_until < datetime.utcnow(),
+            table.c.attempts >= max_attempts
+        )
+        .values(status='dead', locked_until=None, last_error='Lease expired before the item was finished')
+    )
+    db.session.commit()
+    if result.rowcount:
+        logger.warning(f"Dead-lettered {result.rowcount} {table.name} row(s) with expired leases and no attempts left")
+    return result.rowcount
+
+def backoff_delay(attempts, base, maximum):
+    """Exponential backoff with jitter so retries of a burst spread out"""
+    return min(maximum, base * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+
+def reschedule(table, row_id, delay, attempts, error=None):
+    """Hand a leased row back to the queue after delay seconds"""
+    values = {
+        'status': 'pending',
+        'attempts': attempts,
+        'next_attempt_at': datetime.utcnow() + timedelta(seconds=delay),
+        'locked_until': None
+    }
+    if error is not None:
+        values['last_error'] = error
+    
+    db.session.execute(update(table).where(table.c.id == row_id).values(**values))
+    db.session.commit()
+
+def dead_letter(table, row_id, attempts, error):
+    """Park a row that will not be retried"""
+    db.session.execute(
+        update(table)
+        .where(table.c.id == row_id)
+        .values(status='dead', attempts=attempts, locked_until=None, last_error=error)
+    )
+    db.session.commit()
+
+def requeue_dead(table, tenant_id=None):
+    """Give dead-lettered rows a fresh set of attempts"""
+    query = update(table).where(table.c.status == 'dead')
+    if tenant_id:
+        query = query.where(table.c.tenant_id == tenant_id)
+    
+    result = db.session.execute(
+        query.values(status='pending', attempts=0, next_attempt_at=datetime.utcnow(), last_error=None)
+    )
+    db.session.commit()
+    return result.rowcount